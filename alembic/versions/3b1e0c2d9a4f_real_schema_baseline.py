@@ -0,0 +1,217 @@
+"""real schema baseline
+
+Revision ID: 3b1e0c2d9a4f
+Revises: 8318731a1d13
+Create Date: 2026-10-17 02:10:00.000000
+
+Rewizja 8318731a1d13 tworzy tabele innego serwisu (parent_profiles/children),
+a tabele tego serwisu nigdy nie trafiły do migracji. Ta rewizja jest ich
+bazą. Tabele, które już istnieją (np. utworzone ręcznie), są pomijane, więc
+migrację można puścić także na istniejącej bazie. Utworzone tabele są
+zapisywane w baseline_created_tables i downgrade usuwa tylko je.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "3b1e0c2d9a4f"
+down_revision: Union[str, None] = "8318731a1d13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_tables() -> set:
+    if op.get_context().as_sql:
+        # Tryb offline (--sql): brak połączenia, generujemy pełny DDL
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+# Tabela -> typy enum, które tworzy razem z nią
+TABLE_ENUMS = {
+    "collections": ["collection_status_enum"],
+    "class_students": ["class_student_status_enum"],
+    "collection_parts": ["payment_type_enum"],
+}
+
+# Kolejność usuwania (najpierw tabele z kluczami obcymi)
+DROP_ORDER = [
+    "student_collections",
+    "collection_news",
+    "collection_parts",
+    "class_collectors",
+    "class_students",
+    "collections",
+    "classes",
+]
+
+created_tables = sa.table("baseline_created_tables", sa.column("name", sa.String))
+
+
+def upgrade() -> None:
+    existing_tables = _existing_tables()
+
+    if "classes" not in existing_tables:
+        op.create_table(
+            "classes",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("avatar", sa.String(length=255), nullable=True),
+            sa.Column("start_year", sa.Date(), nullable=False),
+            sa.Column("number", sa.String(length=10), nullable=False),
+            sa.Column("chat_id", sa.String(length=255), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "collections" not in existing_tables:
+        op.create_table(
+            "collections",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("class_id", sa.String(length=255), nullable=False),
+            sa.Column("start", sa.DateTime(), nullable=False),
+            sa.Column("end", sa.DateTime(), nullable=False),
+            sa.Column("creation_date", sa.DateTime(), nullable=True),
+            sa.Column("created_by", sa.String(length=255), nullable=False),
+            sa.Column("account_id", sa.String(length=255), nullable=False),
+            sa.Column("title", sa.String(length=255), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("logo", sa.String(length=255), nullable=True),
+            sa.Column("purpose", sa.Text(), nullable=True),
+            sa.Column("total_amount", sa.Numeric(12, 2), nullable=False),
+            sa.Column(
+                "status",
+                sa.Enum(
+                    "NEW",
+                    "ACTIVE",
+                    "BLOCKED",
+                    "CANCELLED",
+                    "CLOSED",
+                    name="collection_status_enum",
+                ),
+                nullable=False,
+            ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "class_students" not in existing_tables:
+        op.create_table(
+            "class_students",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("student_id", sa.String(length=255), nullable=False),
+            sa.Column("class_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("start", sa.DateTime(), nullable=False),
+            sa.Column("end", sa.DateTime(), nullable=True),
+            sa.Column(
+                "status",
+                sa.Enum(
+                    "PENDING",
+                    "ACTIVE",
+                    "REJECTED",
+                    "ENDED",
+                    name="class_student_status_enum",
+                ),
+                nullable=False,
+            ),
+            sa.Column("requested_by_parent_id", sa.String(length=255), nullable=True),
+            sa.ForeignKeyConstraint(["class_id"], ["classes.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            op.f("ix_class_students_status"),
+            "class_students",
+            ["status"],
+            unique=False,
+        )
+
+    if "class_collectors" not in existing_tables:
+        op.create_table(
+            "class_collectors",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("parent_id", sa.String(length=255), nullable=False),
+            sa.Column("class_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("start", sa.DateTime(), nullable=False),
+            sa.Column("end", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["class_id"], ["classes.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "collection_parts" not in existing_tables:
+        op.create_table(
+            "collection_parts",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("name", sa.String(length=255), nullable=False),
+            sa.Column("collection_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("total_amount", sa.Numeric(12, 2), nullable=False),
+            sa.Column(
+                "payment_type",
+                sa.Enum("TOTAL_FIXED", "PERSON_FIXED", name="payment_type_enum"),
+                nullable=False,
+            ),
+            sa.ForeignKeyConstraint(
+                ["collection_id"], ["collections.id"], ondelete="CASCADE"
+            ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "collection_news" not in existing_tables:
+        op.create_table(
+            "collection_news",
+            sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("collection_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("author_id", sa.String(length=255), nullable=False),
+            sa.Column("date", sa.DateTime(), nullable=False),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.ForeignKeyConstraint(
+                ["collection_id"], ["collections.id"], ondelete="CASCADE"
+            ),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+    if "student_collections" not in existing_tables:
+        op.create_table(
+            "student_collections",
+            sa.Column("student_id", sa.String(length=255), nullable=False),
+            sa.Column("collection_id", postgresql.UUID(as_uuid=True), nullable=False),
+            sa.Column("total_amount", sa.Numeric(12, 2), nullable=False),
+            sa.ForeignKeyConstraint(
+                ["collection_id"], ["collections.id"], ondelete="CASCADE"
+            ),
+            sa.PrimaryKeyConstraint("student_id", "collection_id"),
+        )
+
+    op.create_table(
+        "baseline_created_tables",
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    op.bulk_insert(
+        created_tables,
+        [{"name": name} for name in DROP_ORDER if name not in existing_tables],
+    )
+
+
+def _created_tables() -> set:
+    if op.get_context().as_sql:
+        # Tryb offline: upgrade offline zakłada pustą bazę i tworzy wszystko
+        return set(DROP_ORDER)
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("baseline_created_tables"):
+        # Brak zapisu, które tabele są nasze - nic nie usuwamy
+        return set()
+    return set(bind.execute(sa.select(created_tables.c.name)).scalars())
+
+
+def downgrade() -> None:
+    to_drop = _created_tables()
+    for name in DROP_ORDER:
+        if name not in to_drop:
+            continue
+        if name == "class_students":
+            op.drop_index(op.f("ix_class_students_status"), table_name=name)
+        op.drop_table(name)
+        for enum_name in TABLE_ENUMS.get(name, []):
+            sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
+    op.drop_table("baseline_created_tables")
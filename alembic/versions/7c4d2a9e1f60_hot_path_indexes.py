@@ -0,0 +1,70 @@
+"""composite indexes for hot filter/sort paths
+
+Revision ID: 7c4d2a9e1f60
+Revises: 3b1e0c2d9a4f
+Create Date: 2026-10-17 02:20:00.000000
+
+Indeksy są zakładane przez CREATE INDEX CONCURRENTLY (poza transakcją),
+żeby migracja nie blokowała zapisów na dużych tabelach.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c4d2a9e1f60"
+down_revision: Union[str, None] = "3b1e0c2d9a4f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    (
+        "ix_class_students_student_id_status_start",
+        "class_students",
+        ["student_id", "status", "start"],
+    ),
+    ("ix_class_students_class_id_start", "class_students", ["class_id", "start", "id"]),
+    (
+        "ix_collections_class_id_creation_date",
+        "collections",
+        ["class_id", "creation_date", "id"],
+    ),
+    (
+        "ix_collection_news_collection_id_date",
+        "collection_news",
+        ["collection_id", "date", "id"],
+    ),
+    ("ix_class_collectors_class_id_end", "class_collectors", ["class_id", "end"]),
+    ("ix_collection_parts_collection_id", "collection_parts", ["collection_id"]),
+    (
+        "ix_student_collections_collection_id",
+        "student_collections",
+        ["collection_id"],
+    ),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,61 @@
+"""collection_stats table with denormalized collection counters
+
+Revision ID: a5f3e8b71c24
+Revises: 7c4d2a9e1f60
+Create Date: 2026-10-17 03:10:00.000000
+
+Tabelę utrzymuje warstwa CRUD przy każdym zapisie; migracja wypełnia ją
+dla istniejących zbiórek. Rozjazdy naprawia
+`python -m app.scripts.reconcile_collection_stats`.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "a5f3e8b71c24"
+down_revision: Union[str, None] = "7c4d2a9e1f60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "collection_stats",
+        sa.Column("collection_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("participants_count", sa.Integer(), nullable=False),
+        sa.Column("assigned_amount", sa.Numeric(12, 2), nullable=False),
+        sa.Column("parts_total", sa.Numeric(12, 2), nullable=False),
+        sa.Column("news_count", sa.Integer(), nullable=False),
+        sa.Column("last_news_date", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["collection_id"], ["collections.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("collection_id"),
+    )
+    op.execute("""
+        INSERT INTO collection_stats (
+            collection_id, participants_count, assigned_amount,
+            parts_total, news_count, last_news_date
+        )
+        SELECT
+            c.id,
+            (SELECT count(*) FROM student_collections sc
+              WHERE sc.collection_id = c.id),
+            (SELECT coalesce(sum(sc.total_amount), 0) FROM student_collections sc
+              WHERE sc.collection_id = c.id),
+            (SELECT coalesce(sum(p.total_amount), 0) FROM collection_parts p
+              WHERE p.collection_id = c.id),
+            (SELECT count(*) FROM collection_news n
+              WHERE n.collection_id = c.id),
+            (SELECT max(n.date) FROM collection_news n
+              WHERE n.collection_id = c.id)
+        FROM collections c
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table("collection_stats")
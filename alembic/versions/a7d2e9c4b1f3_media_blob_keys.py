@@ -0,0 +1,76 @@
+"""media blob references by key
+
+Revision ID: a7d2e9c4b1f3
+Revises: f3a8c1d5e7b2
+Create Date: 2026-10-17 19:00:00.000000
+
+Referencje do blobów liczone są po kluczu (classes.avatar_key,
+collections.logo_key z kluczem obcym do media_blobs), a nie po URL-u,
+który zależy od konfiguracji. Klucze uzupełniamy z ostatniego segmentu
+zapisanych URL-i (blobs/<sha256><rozszerzenie>), ref_count liczymy od nowa,
+a kolumna media_blobs.url przestaje być potrzebna.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d2e9c4b1f3"
+down_revision: Union[str, None] = "f3a8c1d5e7b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabela, kolumna URL, kolumna klucza)
+REFERENCES = (("classes", "avatar", "avatar_key"), ("collections", "logo", "logo_key"))
+
+
+def upgrade() -> None:
+    for table, url_column, key_column in REFERENCES:
+        op.add_column(
+            table, sa.Column(key_column, sa.String(length=255), nullable=True)
+        )
+        op.create_index(op.f(f"ix_{table}_{key_column}"), table, [key_column])
+        op.create_foreign_key(
+            op.f(f"fk_{table}_{key_column}_media_blobs"),
+            table,
+            "media_blobs",
+            [key_column],
+            ["key"],
+        )
+        op.execute(
+            f"UPDATE {table} SET {key_column} = media_blobs.key FROM media_blobs "
+            f"WHERE {table}.{url_column} LIKE '%/' || media_blobs.key"
+        )
+
+    op.execute(
+        "UPDATE media_blobs SET ref_count = "
+        "(SELECT count(*) FROM classes WHERE classes.avatar_key = media_blobs.key)"
+        " + (SELECT count(*) FROM collections"
+        " WHERE collections.logo_key = media_blobs.key)"
+    )
+    op.drop_column("media_blobs", "url")
+
+
+def downgrade() -> None:
+    op.add_column("media_blobs", sa.Column("url", sa.String(length=255), nullable=True))
+    # URL z wiersza, który wskazuje na blob; nieużywane dostają sam klucz
+    op.execute(
+        "UPDATE media_blobs SET url = coalesce("
+        "(SELECT min(avatar) FROM classes WHERE classes.avatar_key = media_blobs.key),"
+        " (SELECT min(logo) FROM collections"
+        " WHERE collections.logo_key = media_blobs.key),"
+        " key)"
+    )
+    op.alter_column(
+        "media_blobs", "url", existing_type=sa.String(length=255), nullable=False
+    )
+    op.create_unique_constraint("media_blobs_url_key", "media_blobs", ["url"])
+
+    for table, _, key_column in reversed(REFERENCES):
+        op.drop_constraint(
+            op.f(f"fk_{table}_{key_column}_media_blobs"), table, type_="foreignkey"
+        )
+        op.drop_index(op.f(f"ix_{table}_{key_column}"), table_name=table)
+        op.drop_column(table, key_column)
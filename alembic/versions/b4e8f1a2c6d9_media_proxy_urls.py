@@ -0,0 +1,83 @@
+"""rewrite stored media URLs to the media endpoint
+
+Revision ID: b4e8f1a2c6d9
+Revises: a7d2e9c4b1f3
+Create Date: 2026-10-17 20:00:00.000000
+
+Awatary, loga i ich miniatury zapisane przed endpointem /media wskazują
+wprost na MinIO (http://<MINIO_ENDPOINT>/<MINIO_BUCKET>/blobs/...).
+Wiersze z kluczem bloba dostają URL-e pod MEDIA_PUBLIC_URL, budowane
+z części od "blobs/" - ten sam kształt co media_url() w aplikacji.
+
+Zapisywane URL-e są trwałe, więc migracja nie bierze domyślnych wartości
+z app.core.config: MEDIA_PUBLIC_URL (upgrade) oraz MINIO_ENDPOINT
+i MINIO_BUCKET (downgrade) muszą być jawnie ustawione w środowisku.
+"""
+
+import os
+from typing import Optional, Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b4e8f1a2c6d9"
+down_revision: Union[str, None] = "a7d2e9c4b1f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabela, kolumna URL, kolumna miniatur, kolumna klucza)
+REFERENCES = (
+    ("classes", "avatar", "avatar_variants", "avatar_key"),
+    ("collections", "logo", "logo_variants", "logo_key"),
+)
+
+
+def _required_env(name: str) -> str:
+    value = os.environ.get(name)
+    if not value:
+        raise RuntimeError(f"{name} must be set explicitly to run this migration")
+    return value
+
+
+def _rebase(url: Optional[str], base: str) -> Optional[str]:
+    if url is None or "/blobs/" not in url:
+        return url
+    return f"{base}/blobs/{url.split('/blobs/', 1)[1]}"
+
+
+def _rewrite(base: str) -> None:
+    connection = op.get_bind()
+    for table_name, url_column, variants_column, key_column in REFERENCES:
+        table = sa.table(
+            table_name,
+            sa.column("id"),
+            sa.column(url_column, sa.String),
+            sa.column(variants_column, sa.JSON(none_as_null=True)),
+            sa.column(key_column, sa.String),
+        )
+        rows = connection.execute(
+            sa.select(table.c.id, table.c[url_column], table.c[variants_column]).where(
+                table.c[key_column].isnot(None)
+            )
+        ).all()
+        for id, url, variants in rows:
+            if variants is not None:
+                variants = {
+                    size: _rebase(value, base) for size, value in variants.items()
+                }
+            connection.execute(
+                table.update()
+                .where(table.c.id == id)
+                .values({url_column: _rebase(url, base), variants_column: variants})
+            )
+
+
+def upgrade() -> None:
+    _rewrite(_required_env("MEDIA_PUBLIC_URL").rstrip("/"))
+
+
+def downgrade() -> None:
+    _rewrite(
+        f"http://{_required_env('MINIO_ENDPOINT')}/{_required_env('MINIO_BUCKET')}"
+    )
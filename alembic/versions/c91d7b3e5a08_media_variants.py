@@ -0,0 +1,28 @@
+"""avatar/logo thumbnail variants
+
+Revision ID: c91d7b3e5a08
+Revises: a5f3e8b71c24
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c91d7b3e5a08"
+down_revision: Union[str, None] = "a5f3e8b71c24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("classes", sa.Column("avatar_variants", sa.JSON(), nullable=True))
+    op.add_column("collections", sa.Column("logo_variants", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("collections", "logo_variants")
+    op.drop_column("classes", "avatar_variants")
@@ -0,0 +1,41 @@
+"""media_blobs table for content-addressed uploads
+
+Revision ID: e2b6f4a9c317
+Revises: c91d7b3e5a08
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2b6f4a9c317"
+down_revision: Union[str, None] = "c91d7b3e5a08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_blobs",
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("url", sa.String(length=255), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("content_type", sa.String(length=100), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("key"),
+        sa.UniqueConstraint("url"),
+    )
+    op.create_index(
+        op.f("ix_media_blobs_sha256"), "media_blobs", ["sha256"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_media_blobs_sha256"), table_name="media_blobs")
+    op.drop_table("media_blobs")
@@ -0,0 +1,44 @@
+"""collections.creation_date NOT NULL
+
+Revision ID: f3a8c1d5e7b2
+Revises: e2b6f4a9c317
+Create Date: 2026-10-17 18:00:00.000000
+
+Kursor stronicowania zbiórek to (creation_date, id); porównanie krotek
+z NULL nigdy nie jest prawdziwe, więc wiersze bez daty wypadały z listy.
+Brakujące daty uzupełniamy datą rozpoczęcia zbiórki.
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a8c1d5e7b2"
+down_revision: Union[str, None] = "e2b6f4a9c317"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        'UPDATE collections SET creation_date = "start" WHERE creation_date IS NULL'
+    )
+    op.alter_column(
+        "collections",
+        "creation_date",
+        existing_type=sa.DateTime(),
+        nullable=False,
+        server_default=sa.func.now(),
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "collections",
+        "creation_date",
+        existing_type=sa.DateTime(),
+        nullable=True,
+        server_default=None,
+    )
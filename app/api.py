@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.routers import classes, collections, me
+from app.routers import classes, collections, internal, me, media, monitoring
 
 api_router = APIRouter()
 api_router.include_router(
@@ -10,3 +10,6 @@ api_router.include_router(
     collections.router, prefix="/collections", tags=["Collections & Participation"]
 )
 api_router.include_router(me.router, prefix="/me", tags=["Current User"])
+api_router.include_router(monitoring.router, prefix="/monitoring", tags=["Monitoring"])
+api_router.include_router(internal.router, prefix="/internal", tags=["Internal"])
+api_router.include_router(media.router, prefix="/media", tags=["Media"])
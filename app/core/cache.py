@@ -0,0 +1,120 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Cache w pamięci procesu: ograniczony rozmiar z wyrzucaniem najdawniej
+    używanych wpisów (LRU) i czasem życia wpisu (TTL). Przeterminowane wpisy
+    zostają do wyrzucenia przez LRU, żeby get_stale mógł je zwrócić, gdy
+    źródło jest niedostępne. Bez blokad - używany z jednego event loopa.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def get_stale(self, key: Hashable) -> Optional[Any]:
+        """Wartość także po upływie TTL (None, jeśli wpis został wyrzucony)."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        self.stale_hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class RedisCache:
+    """
+    Wspólny cache dla wszystkich workerów (wartości jako JSON w Redisie).
+    Pakiet `redis` jest opcjonalny - importowany dopiero tutaj. Błędy Redisa
+    są logowane i traktowane jak brak wpisu, żeby nie psuły requestów.
+    """
+
+    def __init__(self, url: str, prefix: str) -> None:
+        import redis.asyncio as redis  # opcjonalna zależność
+
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        try:
+            raw = await self._redis.get(self._key(key))
+        except Exception as e:
+            logger.warning("Redis cache get failed: %r", e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        try:
+            await self._redis.set(self._key(key), json.dumps(value), ex=int(ttl))
+        except Exception as e:
+            logger.warning("Redis cache set failed: %r", e)
+
+    async def delete(self, key: Hashable) -> None:
+        try:
+            await self._redis.delete(self._key(key))
+        except Exception as e:
+            logger.warning("Redis cache delete failed: %r", e)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+def create_shared_cache(url: Optional[str], prefix: str) -> Optional[RedisCache]:
+    """RedisCache dla podanego URL albo None (brak URL lub pakietu redis)."""
+    if not url:
+        return None
+    try:
+        return RedisCache(url, prefix)
+    except ImportError:
+        logger.warning(
+            "REDIS_URL is set but the 'redis' package is not installed, "
+            "using the in-process cache only"
+        )
+        return None
@@ -0,0 +1,252 @@
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import (
+    DATABASE_REPLICA_URL,
+    DATABASE_URL,
+    DB_ECHO,
+    DB_MAX_OVERFLOW,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    READ_YOUR_WRITES_SECONDS,
+)
+
+
+class PoolWaitStats:
+    """Czas oczekiwania na połączenie z puli (sumarycznie dla procesu)."""
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float, timed_out: bool = False) -> None:
+        self.checkouts += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        if timed_out:
+            self.timeouts += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "total_wait_seconds": round(self.total_wait, 6),
+            "avg_wait_seconds": (
+                round(self.total_wait / self.checkouts, 6) if self.checkouts else 0.0
+            ),
+            "max_wait_seconds": round(self.max_wait, 6),
+        }
+
+
+# Klucz to pool_logging_name silnika ("primary" / "replica")
+pool_wait_stats: Dict[str, PoolWaitStats] = defaultdict(PoolWaitStats)
+
+# QueuePool._do_get wywołuje się rekurencyjnie - mierzymy tylko zewnętrzne wywołanie
+_in_checkout: ContextVar[bool] = ContextVar("_in_checkout", default=False)
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool, który mierzy czas oczekiwania na połączenie."""
+
+    def _do_get(self):
+        if _in_checkout.get():
+            return super()._do_get()
+
+        token = _in_checkout.set(True)
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            _in_checkout.reset(token)
+            pool_wait_stats[self._orig_logging_name].record(
+                time.perf_counter() - start, timed_out
+            )
+
+
+class RecentWrites:
+    """
+    Zapamiętuje, kiedy użytkownik ostatnio coś zapisał (commit na primary),
+    żeby przez READ_YOUR_WRITES_SECONDS jego odczyty szły na primary, a nie
+    na replikę, która może jeszcze nie mieć tych zmian. Najwyżej max_entries
+    użytkowników - przy przepełnieniu wypada ten z najdawniejszym zapisem.
+    """
+
+    def __init__(self, window: float, max_entries: int = 10_000) -> None:
+        self.window = window
+        self.max_entries = max_entries
+        self._last_write: "OrderedDict[str, float]" = OrderedDict()
+
+    def mark(self, user_id: str) -> None:
+        if self.window <= 0:
+            return
+        self._last_write[user_id] = time.monotonic()
+        self._last_write.move_to_end(user_id)
+        while len(self._last_write) > self.max_entries:
+            self._last_write.popitem(last=False)
+
+    def is_recent(self, user_id: Optional[str]) -> bool:
+        if self.window <= 0 or not user_id:
+            return False
+        last_write = self._last_write.get(user_id)
+        return last_write is not None and time.monotonic() - last_write < self.window
+
+
+recent_writes = RecentWrites(READ_YOUR_WRITES_SECONDS)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_user_write(session: Session) -> None:
+    # user_id ustawia verify_token w request.state - czytany dopiero przy
+    # commicie, bo sesja może powstać przed uwierzytelnieniem
+    request_state = session.info.get("request_state")
+    user_id = session.info.get("user_id") or getattr(request_state, "user_id", None)
+    if user_id:
+        recent_writes.mark(user_id)
+
+
+_UNIT_OF_WORK_KEY = "unit_of_work"
+
+
+@asynccontextmanager
+async def unit_of_work(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """
+    Jedna transakcja na kilka operacji CRUD. Metody CRUD wewnątrz bloku
+    tylko flushują (commit_or_flush), a commit - jeden - robi wyjście
+    z bloku; wyjątek wycofuje wszystko. Zagnieżdżone bloki dołączają
+    do zewnętrznego.
+    """
+    if db.info.get(_UNIT_OF_WORK_KEY):
+        yield db
+        return
+
+    db.info[_UNIT_OF_WORK_KEY] = True
+    try:
+        yield db
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        db.info.pop(_UNIT_OF_WORK_KEY, None)
+
+
+async def commit_or_flush(db: AsyncSession) -> None:
+    """Commit poza unit_of_work, flush (bez końca transakcji) wewnątrz."""
+    if db.info.get(_UNIT_OF_WORK_KEY):
+        await db.flush()
+    else:
+        await db.commit()
+
+
+engine: Optional[AsyncEngine] = None
+async_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+
+replica_engine: Optional[AsyncEngine] = None
+replica_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+
+
+def _create_engine(url: str, name: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=DB_ECHO,
+        poolclass=TimedAsyncQueuePool,
+        pool_logging_name=name,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+def init_engine() -> AsyncEngine:
+    """
+    Tworzy jeden silnik (i pulę połączeń) na cały proces, plus osobny silnik
+    dla repliki, jeśli ustawiono DATABASE_REPLICA_URL. Wołane w lifespan.
+    """
+    global engine, async_session_factory, replica_engine, replica_session_factory
+
+    if engine is not None:
+        return engine
+
+    engine = _create_engine(DATABASE_URL, "primary")
+    async_session_factory = async_sessionmaker(
+        bind=engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    if DATABASE_REPLICA_URL:
+        replica_engine = _create_engine(DATABASE_REPLICA_URL, "replica")
+        replica_session_factory = async_sessionmaker(
+            bind=replica_engine, class_=AsyncSession, expire_on_commit=False
+        )
+    return engine
+
+
+async def dispose_engine() -> None:
+    """Zamyka wszystkie połączenia z puli. Wołane przy zamykaniu aplikacji."""
+    global engine, async_session_factory, replica_engine, replica_session_factory
+
+    if replica_engine is not None:
+        await replica_engine.dispose()
+        replica_engine = None
+        replica_session_factory = None
+
+    if engine is not None:
+        await engine.dispose()
+        engine = None
+        async_session_factory = None
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    if async_session_factory is None:
+        raise RuntimeError("Database engine is not initialized, call init_engine()")
+    return async_session_factory
+
+
+def get_read_session_factory() -> Optional[async_sessionmaker[AsyncSession]]:
+    """Fabryka sesji dla repliki albo None, jeśli replika nie jest skonfigurowana."""
+    return replica_session_factory
+
+
+def _engine_pool_stats(db_engine: AsyncEngine, name: str) -> dict:
+    pool = db_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": DB_MAX_OVERFLOW,
+        "wait": pool_wait_stats[name].as_dict(),
+    }
+
+
+def get_pool_stats() -> dict:
+    """Stan puli połączeń do monitoringu."""
+    if engine is None:
+        return {"initialized": False}
+
+    stats = {"initialized": True, "primary": _engine_pool_stats(engine, "primary")}
+    if replica_engine is not None:
+        stats["replica"] = _engine_pool_stats(replica_engine, "replica")
+    return stats
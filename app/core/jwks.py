@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+import httpx
+from jose import jwk
+from jose.backends.base import Key
+from jose.exceptions import JWKError
+
+logger = logging.getLogger(__name__)
+
+
+class JWKSProvider:
+    """
+    Klucze podpisu tokenów z endpointu JWKS Keycloaka (mapa kid -> klucz).
+
+    Klucze są pobierane przy starcie i odświeżane w tle co
+    `refresh_interval` sekund albo wcześniej, gdy przyjdzie token z nieznanym
+    kid (najczęściej raz na `min_refresh_interval`). get_key nigdy nie czeka
+    na sieć - zwraca to, co jest w pamięci.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        refresh_interval: float,
+        min_refresh_interval: float,
+        timeout: float = 5.0,
+    ) -> None:
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._keys: Dict[str, Key] = {}
+        self._last_fetch = 0.0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def keys(self) -> Dict[str, Key]:
+        return self._keys
+
+    def get_key(self, kid: Optional[str]) -> Optional[Key]:
+        """Klucz dla kid; przy nieznanym kid zleca odświeżenie w tle i zwraca None."""
+        if kid is None:
+            # Token bez kid - jednoznaczny tylko przy jednym kluczu
+            return next(iter(self._keys.values())) if len(self._keys) == 1 else None
+        key = self._keys.get(kid)
+        if key is None:
+            self._wake.set()
+        return key
+
+    async def refresh(self) -> None:
+        """Pobiera JWKS i podmienia całą mapę kluczy naraz."""
+        self._last_fetch = time.monotonic()
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+            jwks = response.json()
+
+        keys: Dict[str, Key] = {}
+        for key_data in jwks.get("keys", []):
+            kid = key_data.get("kid")
+            if not kid or key_data.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[kid] = jwk.construct(key_data, key_data.get("alg", "RS256"))
+            except JWKError as e:
+                logger.warning("Skipping JWKS key %s: %s", kid, e)
+        self._keys = keys
+        logger.info("Loaded %d signing key(s) from JWKS", len(keys))
+
+    async def _safe_refresh(self) -> None:
+        try:
+            await self.refresh()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("JWKS refresh from %s failed: %r", self.url, e)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            # Ogranicz odświeżanie wywołane nieznanym kid (np. sfałszowane tokeny)
+            wait = self._last_fetch + self.min_refresh_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._safe_refresh()
+
+    async def start(self) -> None:
+        """Pierwsze pobranie (błąd nie blokuje startu) i pętla odświeżania w tle."""
+        await self._safe_refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "kids": sorted(self._keys),
+            "seconds_since_fetch": (
+                round(time.monotonic() - self._last_fetch, 1)
+                if self._last_fetch
+                else None
+            ),
+        }
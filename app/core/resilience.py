@@ -0,0 +1,109 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Łączy równoległe wywołania dla tego samego klucza: pierwsze uruchamia
+    funkcję, kolejne czekają na jej wynik (lub wyjątek) zamiast wołać ją
+    ponownie. Anulowanie jednego z czekających nie anuluje pozostałych.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def _done(self, key: Hashable, future: asyncio.Future) -> None:
+        self._calls.pop(key, None)
+        if not future.cancelled():
+            future.exception()  # żeby nieodebrany wyjątek nie był logowany
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._done(key, f))
+        return await asyncio.shield(future)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class CircuitBreaker:
+    """
+    Bezpiecznik dla wywołań zewnętrznego serwisu.
+
+    closed - wywołania przechodzą, po `failure_threshold` kolejnych błędach
+    przechodzi w open. open - wywołania są od razu odrzucane przez
+    `reset_timeout` sekund, potem half_open. half_open - przepuszcza jedno
+    wywołanie próbne: sukces zamyka bezpiecznik, błąd otwiera go ponownie.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probe_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+            logger.info("Circuit breaker %s half-open, probing", self.name)
+
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("Circuit breaker %s closed", self.name)
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def release(self) -> None:
+        """
+        Wywołanie zakończyło się bez odpowiedzi serwisu, ale nie z jego winy
+        (np. anulowanie) - zwalnia próbę half_open bez liczenia błędu.
+        """
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    "Circuit breaker %s open after %d failure(s)",
+                    self.name,
+                    self.failures,
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "rejected": self.rejected,
+        }
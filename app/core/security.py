@@ -1,21 +1,77 @@
-from fastapi import Depends, HTTPException, status
+import hashlib
+import time
+
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from app.core.config import KEYCLOAK_CLIENT_PUBLIC_KEY
+from jose import JWTError, jwk, jwt
+from app.core.cache import TTLCache
+from app.core.config import (
+    JWKS_MIN_REFRESH_INTERVAL,
+    JWKS_REFRESH_INTERVAL,
+    JWT_CLAIMS_CACHE_MAX_SIZE,
+    JWT_CLAIMS_CACHE_MAX_TTL,
+    KEYCLOAK_CLIENT_PUBLIC_KEY,
+    KEYCLOAK_JWKS_URL,
+)
+from app.core.jwks import JWKSProvider
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-
-def verify_token(token: str = Depends(oauth2_scheme)):
-    public_key = (
-        "-----BEGIN PUBLIC KEY-----\n"
-        + KEYCLOAK_CLIENT_PUBLIC_KEY
-        + "\n-----END PUBLIC KEY-----"
+# Klucze z JWKS (kid -> klucz), start/stop w lifespan
+jwks_provider = (
+    JWKSProvider(
+        KEYCLOAK_JWKS_URL,
+        refresh_interval=JWKS_REFRESH_INTERVAL,
+        min_refresh_interval=JWKS_MIN_REFRESH_INTERVAL,
     )
+    if KEYCLOAK_JWKS_URL
+    else None
+)
+
+# Statyczny klucz - używany tylko, dopóki z JWKS nie uda się wczytać żadnego
+# klucza. Parsowany raz przy imporcie, nie przy każdym requeście
+public_key = jwk.construct(
+    "-----BEGIN PUBLIC KEY-----\n"
+    + KEYCLOAK_CLIENT_PUBLIC_KEY
+    + "\n-----END PUBLIC KEY-----",
+    algorithm="RS256",
+)
+
+# sha256(token) -> zweryfikowane claims, wpis wygasa razem z tokenem (exp)
+claims_cache = TTLCache(JWT_CLAIMS_CACHE_MAX_SIZE, JWT_CLAIMS_CACHE_MAX_TTL)
+
+
+def _cache_ttl(claims: dict) -> float:
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)):
+        return JWT_CLAIMS_CACHE_MAX_TTL
+    return min(exp - time.time(), JWT_CLAIMS_CACHE_MAX_TTL)
+
+
+def _signing_key(token: str):
+    """Klucz weryfikujący token wg kid z nagłówka (bez czekania na sieć)."""
+    if jwks_provider is None or not jwks_provider.keys:
+        return public_key
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = jwks_provider.get_key(kid)
+    if key is None:
+        raise JWTError(f"Unknown signing key: {kid}")
+    return key
+
+
+async def verify_token(request: Request, token: str = Depends(oauth2_scheme)):
+    key = hashlib.sha256(token.encode()).hexdigest()
+    claims = claims_cache.get(key)
+    if claims is not None:
+        request.state.user_id = claims.get("sub")
+        return dict(claims)
 
     try:
-        return jwt.decode(
-            token, public_key, algorithms=["RS256"], options={"verify_aud": False}
+        claims = jwt.decode(
+            token,
+            _signing_key(token),
+            algorithms=["RS256"],
+            options={"verify_aud": False},
         )
     except JWTError as e:
         raise HTTPException(
@@ -23,3 +79,9 @@ def verify_token(token: str = Depends(oauth2_scheme)):
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         ) from e
+
+    ttl = _cache_ttl(claims)
+    if ttl > 0:
+        claims_cache.set(key, claims, ttl=ttl)
+    request.state.user_id = claims.get("sub")
+    return dict(claims)
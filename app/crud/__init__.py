@@ -5,3 +5,5 @@ from .crud_collection_news import collection_news
 from .crud_class_student import class_student
 from .crud_class_collector import class_collector
 from .crud_student_collection import student_collection
+from .crud_collection_stats import collection_stats
+from .crud_media_blob import media_blob
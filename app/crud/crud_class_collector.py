@@ -1,21 +1,43 @@
 import uuid
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import commit_or_flush
+from app.crud.nested import get_with_parent
+from app.crud.pagination import Keyset
 from app.models.class_collector import ClassCollector
+from app.models.school_class import SchoolClass
 from app.schemas.class_collector import ClassCollectorCreate, ClassCollectorUpdate
 
 
 class CRUDClassCollector:
+    keyset = Keyset(ClassCollector.start, ClassCollector.id, descending=True)
+
     async def get(self, db: AsyncSession, id: uuid.UUID) -> Optional[ClassCollector]:
         result = await db.execute(
             select(ClassCollector).filter(ClassCollector.id == id)
         )
         return result.scalars().first()
 
+    async def get_for_class(
+        self, db: AsyncSession, *, class_id: uuid.UUID, class_collector_id: uuid.UUID
+    ) -> Tuple[bool, Optional[ClassCollector]]:
+        """
+        Pobiera przypisanie skarbnika w jednym zapytaniu razem ze sprawdzeniem
+        klasy. Zwraca (czy klasa istnieje, przypisanie lub None).
+        """
+        return await get_with_parent(
+            db,
+            parent_id_column=SchoolClass.id,
+            parent_id=class_id,
+            child=ClassCollector,
+            parent_fk_column=ClassCollector.class_id,
+            id=class_collector_id,
+        )
+
     async def get_multi_by_class(
         self,
         db: AsyncSession,
@@ -23,14 +45,15 @@ class CRUDClassCollector:
         class_id: uuid.UUID,
         skip: int = 0,
         limit: int = 100,
-        only_active: bool = False
+        only_active: bool = False,
+        cursor: Optional[str] = None
     ) -> List[ClassCollector]:
         statement = select(ClassCollector).filter(ClassCollector.class_id == class_id)
         if only_active:
             statement = statement.filter(
                 (ClassCollector.end == None) | (ClassCollector.end > datetime.now())
             )
-        statement = statement.offset(skip).limit(limit)
+        statement = self.keyset.apply(statement, cursor=cursor, skip=skip, limit=limit)
         result = await db.execute(statement)
         return result.scalars().all()
 
@@ -38,15 +61,18 @@ class CRUDClassCollector:
         self, db: AsyncSession, *, obj_in: ClassCollectorCreate, class_id: uuid.UUID
     ) -> ClassCollector:
         start_date = obj_in.start if obj_in.start else datetime.now()
-        db_obj = ClassCollector(
-            parent_id=obj_in.parent_id,
-            class_id=class_id,
-            start=start_date,
-            end=obj_in.end,
+        result = await db.execute(
+            insert(ClassCollector)
+            .values(
+                parent_id=obj_in.parent_id,
+                class_id=class_id,
+                start=start_date,
+                end=obj_in.end,
+            )
+            .returning(ClassCollector)
         )
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        db_obj = result.scalars().one()
+        await commit_or_flush(db)
         return db_obj
 
     async def update(
@@ -54,21 +80,30 @@ class CRUDClassCollector:
     ) -> ClassCollector:
         update_data = obj_in.dict(exclude_unset=True)
         # Głównie do ustawiania daty 'end'
-        for field, value in update_data.items():
-            setattr(db_obj, field, value)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        if not update_data:
+            return db_obj
+        result = await db.execute(
+            update(ClassCollector)
+            .filter(ClassCollector.id == db_obj.id)
+            .values(**update_data)
+            .returning(ClassCollector),
+            execution_options={"populate_existing": True},
+        )
+        db_obj = result.scalars().one()
+        await commit_or_flush(db)
         return db_obj
 
     async def remove(
         self, db: AsyncSession, *, id: uuid.UUID
     ) -> Optional[ClassCollector]:
         """Usuwa przypisanie skarbnika do klasy. Rozważ użycie update z datą 'end'."""
-        db_obj = await self.get(db=db, id=id)
-        if db_obj:
-            await db.delete(db_obj)
-            await db.commit()
+        result = await db.execute(
+            delete(ClassCollector)
+            .filter(ClassCollector.id == id)
+            .returning(ClassCollector)
+        )
+        db_obj = result.scalars().first()
+        await commit_or_flush(db)
         return db_obj
 
 
@@ -1,20 +1,42 @@
 import uuid
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
-from sqlalchemy import and_, select
+from sqlalchemy import and_, delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import commit_or_flush
+from app.crud.nested import get_with_parent
+from app.crud.pagination import Keyset
 from app.models.class_student import ClassStudent
 from app.models.enums import ClassStudentStatus
+from app.models.school_class import SchoolClass
 from app.schemas.class_student import ClassStudentRequestCreate, ClassStudentUpdate
 
 
 class CRUDClassStudent:
+    keyset = Keyset(ClassStudent.start, ClassStudent.id, descending=True)
+
     async def get(self, db: AsyncSession, id: uuid.UUID) -> Optional[ClassStudent]:
         result = await db.execute(select(ClassStudent).filter(ClassStudent.id == id))
         return result.scalars().first()
 
+    async def get_for_class(
+        self, db: AsyncSession, *, class_id: uuid.UUID, class_student_id: uuid.UUID
+    ) -> Tuple[bool, Optional[ClassStudent]]:
+        """
+        Pobiera przypisanie studenta w jednym zapytaniu razem ze sprawdzeniem
+        klasy. Zwraca (czy klasa istnieje, przypisanie lub None).
+        """
+        return await get_with_parent(
+            db,
+            parent_id_column=SchoolClass.id,
+            parent_id=class_id,
+            child=ClassStudent,
+            parent_fk_column=ClassStudent.class_id,
+            id=class_student_id,
+        )
+
     async def get_by_student_and_class(
         self, db: AsyncSession, *, student_id: str, class_id: uuid.UUID
     ) -> Optional[ClassStudent]:
@@ -34,15 +56,14 @@ class CRUDClassStudent:
         skip: int = 0,
         limit: int = 100,
         status: Optional[ClassStudentStatus] = None,  # Dodaj filtr statusu
+        cursor: Optional[str] = None,
     ) -> List[ClassStudent]:
         statement = select(ClassStudent).filter(ClassStudent.class_id == class_id)
         if status:
             statement = statement.filter(ClassStudent.status == status)
 
-        # Sortowanie, np. po dacie dodania lub statusie
-        statement = (
-            statement.order_by(ClassStudent.start.desc()).offset(skip).limit(limit)
-        )
+        # Sortowanie po dacie dodania (start, id)
+        statement = self.keyset.apply(statement, cursor=cursor, skip=skip, limit=limit)
         result = await db.execute(statement)
         return result.scalars().all()
 
@@ -54,17 +75,37 @@ class CRUDClassStudent:
         skip: int = 0,
         limit: int = 100,
         status: Optional[ClassStudentStatus] = None,  # Dodaj filtr statusu
+        cursor: Optional[str] = None,
     ) -> List[ClassStudent]:
         """Pobiera wszystkie przypisania danego studenta do klas."""
         statement = select(ClassStudent).filter(ClassStudent.student_id == student_id)
         if status:
             statement = statement.filter(ClassStudent.status == status)
-        statement = (
-            statement.order_by(ClassStudent.start.desc()).offset(skip).limit(limit)
-        )
+        statement = self.keyset.apply(statement, cursor=cursor, skip=skip, limit=limit)
         result = await db.execute(statement)
         return result.scalars().all()
 
+    async def get_active_classes_for_students(
+        self, db: AsyncSession, *, student_ids: List[str]
+    ) -> List[Tuple[SchoolClass, str]]:
+        """
+        Klasy, do których aktywnie uczęszczają podani uczniowie, jednym
+        zapytaniem (class_students JOIN classes). Zwraca pary
+        (klasa, student_id) - klasa powtarza się dla każdego ucznia.
+        """
+        if not student_ids:
+            return []
+        result = await db.execute(
+            select(SchoolClass, ClassStudent.student_id)
+            .join(ClassStudent, ClassStudent.class_id == SchoolClass.id)
+            .filter(
+                ClassStudent.student_id.in_(student_ids),
+                ClassStudent.status == ClassStudentStatus.ACTIVE,
+            )
+            .order_by(SchoolClass.id, ClassStudent.start.desc())
+        )
+        return result.tuples().all()
+
     async def create_request(
         self,
         db: AsyncSession,
@@ -91,16 +132,19 @@ class CRUDClassStudent:
                 f"Student {obj_in.student_id} already has an active or pending request for class {class_id}"
             )
 
-        db_obj = ClassStudent(
-            student_id=obj_in.student_id,
-            class_id=class_id,
-            start=datetime.now(),  # Data zgłoszenia
-            status=ClassStudentStatus.PENDING,  # Zawsze jako oczekujące
-            requested_by_parent_id=requested_by_parent_id,
+        result = await db.execute(
+            insert(ClassStudent)
+            .values(
+                student_id=obj_in.student_id,
+                class_id=class_id,
+                start=datetime.now(),  # Data zgłoszenia
+                status=ClassStudentStatus.PENDING,  # Zawsze jako oczekujące
+                requested_by_parent_id=requested_by_parent_id,
+            )
+            .returning(ClassStudent)
         )
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        db_obj = result.scalars().one()
+        await commit_or_flush(db)
         return db_obj
 
     async def update_status(
@@ -113,18 +157,74 @@ class CRUDClassStudent:
         ):
             # Można aktywować tylko oczekujące zgłoszenie (lub np. zakończone?)
             raise ValueError(f"Cannot activate assignment with status {db_obj.status}")
+        update_data = {"status": new_status}
         if new_status == ClassStudentStatus.ACTIVE:
             # Ustaw datę startową na teraz, jeśli aktywujemy? Lub zostaw datę zgłoszenia?
-            # db_obj.start = datetime.now() # Rozważ, czy to potrzebne
+            # update_data["start"] = datetime.now() # Rozważ, czy to potrzebne
             pass  # Na razie zostawiamy datę zgłoszenia jako start
         elif new_status == ClassStudentStatus.ENDED:
-            db_obj.end = datetime.now()  # Ustaw datę zakończenia
+            update_data["end"] = datetime.now()  # Ustaw datę zakończenia
 
-        db_obj.status = new_status
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
-        return db_obj
+        return await self._update_returning(db, db_obj=db_obj, values=update_data)
+
+    async def bulk_update_pending_status(
+        self,
+        db: AsyncSession,
+        *,
+        class_id: uuid.UUID,
+        new_status: ClassStudentStatus,
+        class_student_ids: Optional[List[uuid.UUID]] = None,
+    ) -> Tuple[bool, List[ClassStudent], Dict[uuid.UUID, Optional[ClassStudentStatus]]]:
+        """
+        Zmienia status oczekujących zgłoszeń klasy jednym
+        UPDATE ... WHERE status = 'pending' ... RETURNING.
+
+        class_student_ids=None oznacza wszystkie oczekujące zgłoszenia klasy.
+        Zwraca (czy klasa istnieje, zaktualizowane przypisania, {id: aktualny
+        status} dla podanych id, których nie dało się zmienić - status None
+        oznacza brak przypisania w tej klasie). Zaktualizowany wiersz
+        potwierdza istnienie klasy, więc dodatkowe zapytanie (o klasę i
+        statusy) idzie tylko wtedy, gdy UPDATE zwrócił za mało wierszy.
+        """
+        statement = update(ClassStudent).filter(
+            ClassStudent.class_id == class_id,
+            ClassStudent.status == ClassStudentStatus.PENDING,
+        )
+        if class_student_ids is not None:
+            statement = statement.filter(ClassStudent.id.in_(class_student_ids))
+
+        result = await db.execute(
+            statement.values(status=new_status).returning(ClassStudent),
+            execution_options={"populate_existing": True},
+        )
+        updated = list(result.scalars().all())
+
+        missing = []
+        if class_student_ids is not None:
+            updated_ids = {db_obj.id for db_obj in updated}
+            missing = [id for id in class_student_ids if id not in updated_ids]
+
+        failed: Dict[uuid.UUID, Optional[ClassStudentStatus]] = {}
+        if not updated or missing:
+            result = await db.execute(
+                select(SchoolClass.id, ClassStudent.id, ClassStudent.status)
+                .outerjoin(
+                    ClassStudent,
+                    and_(
+                        ClassStudent.class_id == SchoolClass.id,
+                        ClassStudent.id.in_(missing),
+                    ),
+                )
+                .filter(SchoolClass.id == class_id)
+            )
+            rows = result.all()
+            if not rows:
+                return False, [], {}
+            statuses = {id: status for _, id, status in rows if id is not None}
+            failed = {id: statuses.get(id) for id in missing}
+
+        await commit_or_flush(db)
+        return True, updated, failed
 
     # Funkcja 'update' może pozostać do ogólnych zmian, ale zmiana statusu przez dedykowaną funkcję
     async def update(
@@ -134,28 +234,42 @@ class CRUDClassStudent:
         # Nie pozwól na zmianę statusu przez tę ogólną funkcję, użyj update_status
         if "status" in update_data:
             del update_data["status"]  # Lub rzuć błąd
+        values = {}
         if "end" in update_data:
-            db_obj.end = update_data["end"]
+            values["end"] = update_data["end"]
             # Jeśli ustawiono datę zakończenia, zmień status na ENDED?
             if update_data["end"] and update_data["end"] <= datetime.now():
-                db_obj.status = ClassStudentStatus.ENDED
+                values["status"] = ClassStudentStatus.ENDED
 
         # Tutaj można dodać logikę dla innych pól, jeśli są
-        # for field, value in update_data.items():
-        #     setattr(db_obj, field, value)
 
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        if not values:
+            return db_obj
+        return await self._update_returning(db, db_obj=db_obj, values=values)
+
+    async def _update_returning(
+        self, db: AsyncSession, *, db_obj: ClassStudent, values: dict
+    ) -> ClassStudent:
+        """UPDATE ... RETURNING - zwraca zaktualizowany wiersz bez dodatkowego SELECT."""
+        result = await db.execute(
+            update(ClassStudent)
+            .filter(ClassStudent.id == db_obj.id)
+            .values(**values)
+            .returning(ClassStudent),
+            execution_options={"populate_existing": True},
+        )
+        db_obj = result.scalars().one()
+        await commit_or_flush(db)
         return db_obj
 
     async def remove(
         self, db: AsyncSession, *, id: uuid.UUID
     ) -> Optional[ClassStudent]:
-        db_obj = await self.get(db=db, id=id)
-        if db_obj:
-            await db.delete(db_obj)
-            await db.commit()
+        result = await db.execute(
+            delete(ClassStudent).filter(ClassStudent.id == id).returning(ClassStudent)
+        )
+        db_obj = result.scalars().first()
+        await commit_or_flush(db)
         return db_obj
 
 
@@ -1,71 +1,265 @@
 import uuid
-from typing import List, Optional
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
 from datetime import datetime
 
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
+from app.core.database import commit_or_flush, unit_of_work
+from app.crud.crud_collection_stats import collection_stats
+from app.crud.crud_media_blob import key_from_url, media_blob
+from app.crud.crud_student_collection import student_collection
+from app.crud.pagination import Keyset
 from app.models.collection import Collection
+from app.models.collection_part import CollectionPart, PaymentType
+from app.models.collection_stats import CollectionStats
 from app.schemas.collection import CollectionCreate, CollectionUpdate
 
 
 class CRUDCollection:
-    async def get(self, db: AsyncSession, id: uuid.UUID) -> Optional[Collection]:
-        result = await db.execute(select(Collection).filter(Collection.id == id))
+    keyset = Keyset(Collection.creation_date, Collection.id, descending=True)
+    # Nazwa w ?expand= -> relacja modelu
+    expandable = {
+        "parts": Collection.parts,
+        "news": Collection.news,
+        "students": Collection.student_collections,
+    }
+
+    def _select(self, expand: Sequence[str] = ()):
+        """SELECT zbiórek z relacjami z expand - jedno zapytanie IN na relację."""
+        return select(Collection).options(
+            *(selectinload(self.expandable[name]) for name in expand)
+        )
+
+    async def get(
+        self, db: AsyncSession, id: uuid.UUID, expand: Sequence[str] = ()
+    ) -> Optional[Collection]:
+        result = await db.execute(self._select(expand).filter(Collection.id == id))
         return result.scalars().first()
 
     async def get_multi(
-        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        expand: Sequence[str] = ()
     ) -> List[Collection]:
-        result = await db.execute(
-            select(Collection)
-            .order_by(Collection.creation_date.desc())
-            .offset(skip)
-            .limit(limit)
+        statement = self.keyset.apply(
+            self._select(expand), cursor=cursor, skip=skip, limit=limit
         )
+        result = await db.execute(statement)
         return result.scalars().all()
 
     async def get_multi_by_class(
-        self, db: AsyncSession, *, class_id: str, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        class_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        expand: Sequence[str] = ()
     ) -> List[Collection]:
-        result = await db.execute(
-            select(Collection)
-            .filter(Collection.class_id == class_id)
-            .order_by(Collection.creation_date.desc())
-            .offset(skip)
-            .limit(limit)
+        statement = self.keyset.apply(
+            self._select(expand).filter(Collection.class_id == class_id),
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
         )
+        result = await db.execute(statement)
         return result.scalars().all()
 
+    async def get_summaries(
+        self, db: AsyncSession, *, ids: Sequence[uuid.UUID]
+    ) -> Dict[uuid.UUID, dict]:
+        """
+        Podsumowanie postępu zbiórek jednym zapytaniem: liczba uczestników,
+        suma kwot uczestników, sumy części i pozostała kwota.
+        Liczniki pochodzą z collection_stats, więc koszt nie zależy od
+        liczby uczestników. Zwraca {collection_id: podsumowanie},
+        brak klucza = brak zbiórki.
+        """
+        if not ids:
+            return {}
+
+        # Jeden wiersz na część (lub jeden wiersz z NULL-ami dla zbiórki bez części)
+        statement = (
+            select(
+                Collection.id,
+                Collection.total_amount,
+                func.coalesce(CollectionStats.participants_count, 0),
+                func.coalesce(CollectionStats.assigned_amount, 0),
+                func.coalesce(CollectionStats.parts_total, 0),
+                func.coalesce(CollectionStats.news_count, 0),
+                CollectionStats.last_news_date,
+                CollectionPart.id,
+                CollectionPart.name,
+                CollectionPart.payment_type,
+                CollectionPart.total_amount,
+            )
+            .outerjoin(CollectionStats, CollectionStats.collection_id == Collection.id)
+            .outerjoin(CollectionPart, CollectionPart.collection_id == Collection.id)
+            .filter(Collection.id.in_(ids))
+            .order_by(Collection.id, CollectionPart.name, CollectionPart.id)
+        )
+        result = await db.execute(statement)
+
+        summaries: Dict[uuid.UUID, dict] = {}
+        for (
+            collection_id,
+            total_amount,
+            participants_count,
+            assigned_amount,
+            parts_total,
+            news_count,
+            last_news_date,
+            part_id,
+            part_name,
+            payment_type,
+            part_amount,
+        ) in result.all():
+            summary = summaries.get(collection_id)
+            if summary is None:
+                assigned_amount = Decimal(assigned_amount)
+                summary = summaries[collection_id] = {
+                    "collection_id": collection_id,
+                    "total_amount": total_amount,
+                    "participants_count": participants_count,
+                    "assigned_amount": assigned_amount,
+                    "remaining_amount": total_amount - assigned_amount,
+                    "parts_total": parts_total,
+                    "news_count": news_count,
+                    "last_news_date": last_news_date,
+                    "parts": [],
+                }
+            if part_id is not None:
+                if payment_type == PaymentType.PERSON_FIXED:
+                    part_total = part_amount * participants_count
+                else:
+                    part_total = part_amount
+                summary["parts"].append(
+                    {
+                        "id": part_id,
+                        "name": part_name,
+                        "payment_type": payment_type,
+                        "amount": part_amount,
+                        "total": part_total,
+                    }
+                )
+        return summaries
+
     async def create(
         self, db: AsyncSession, *, obj_in: CollectionCreate, created_by_id: str
     ) -> Collection:
-        db_obj = Collection(
-            **obj_in.dict(),
-            created_by=created_by_id,
-            creation_date=datetime.now()  # Ensure creation date is set
-        )
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        # Referencja logo, zbiórka, części, statystyki i uczestnictwa - jedna
+        # transakcja
+        async with unit_of_work(db):
+            values = obj_in.dict(exclude={"parts"})
+            if values.get("logo") is not None:
+                values["logo"] = str(values["logo"])
+            logo_key = await media_blob.add_ref(
+                db, key=key_from_url(values.get("logo"))
+            )
+            result = await db.execute(
+                insert(Collection)
+                .values(
+                    **values,
+                    logo_key=logo_key,
+                    created_by=created_by_id,
+                    creation_date=datetime.now(),  # Ensure creation date is set
+                )
+                .returning(Collection)
+            )
+            db_obj = result.scalars().one()
+            if obj_in.parts:
+                await db.execute(
+                    insert(CollectionPart).values(
+                        [
+                            {**part.dict(), "collection_id": db_obj.id}
+                            for part in obj_in.parts
+                        ]
+                    )
+                )
+            await collection_stats.add(
+                db,
+                collection_id=db_obj.id,
+                parts_total=sum(part.total_amount for part in obj_in.parts),
+            )
+            # Uczestnictwo aktywnych uczniów klasy - w tej samej transakcji
+            await student_collection.create_for_active_class_students(
+                db=db, collection_id=db_obj.id, class_id=db_obj.class_id
+            )
         return db_obj
 
     async def update(
         self, db: AsyncSession, *, db_obj: Collection, obj_in: CollectionUpdate
     ) -> Collection:
         update_data = obj_in.dict(exclude_unset=True)
-        for field in update_data:
-            setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        if not update_data:
+            return db_obj
+        if "logo" in update_data:
+            logo = update_data["logo"]
+            update_data["logo"] = str(logo) if logo is not None else None
+            if update_data["logo"] != db_obj.logo:
+                # Miniatury dotyczyły poprzedniego logo
+                update_data["logo_variants"] = None
+                update_data["logo_key"] = await media_blob.replace_ref(
+                    db,
+                    old=db_obj.logo_key,
+                    new=key_from_url(update_data["logo"]),
+                )
+        result = await db.execute(
+            update(Collection)
+            .filter(Collection.id == db_obj.id)
+            .values(**update_data)
+            .returning(Collection),
+            execution_options={"populate_existing": True},
+        )
+        db_obj = result.scalars().one()
+        await commit_or_flush(db)
+        return db_obj
+
+    async def set_logo(
+        self, db: AsyncSession, *, db_obj: Collection, logo: str, logo_key: str
+    ) -> Collection:
+        """Ustawia logo na zarejestrowany blob (logo_key) i przenosi referencję."""
+        logo_key = await media_blob.replace_ref(db, old=db_obj.logo_key, new=logo_key)
+        result = await db.execute(
+            update(Collection)
+            .filter(Collection.id == db_obj.id)
+            .values(logo=logo, logo_key=logo_key, logo_variants=None)
+            .returning(Collection),
+            execution_options={"populate_existing": True},
+        )
+        db_obj = result.scalars().one()
+        await commit_or_flush(db)
         return db_obj
 
+    async def set_logo_variants(
+        self, db: AsyncSession, *, id: uuid.UUID, logo_key: str, variants: dict
+    ) -> bool:
+        """Zapisuje miniatury, o ile logo nie zmieniło się w międzyczasie."""
+        result = await db.execute(
+            update(Collection)
+            .filter(Collection.id == id, Collection.logo_key == logo_key)
+            .values(logo_variants=variants)
+        )
+        await commit_or_flush(db)
+        return result.rowcount > 0
+
     async def remove(self, db: AsyncSession, *, id: uuid.UUID) -> Optional[Collection]:
-        db_obj = await self.get(db=db, id=id)
-        if db_obj:
-            await db.delete(db_obj)
-            await db.commit()
+        # Części, newsy i uczestnictwa usuwa ON DELETE CASCADE w bazie
+        result = await db.execute(
+            delete(Collection).filter(Collection.id == id).returning(Collection)
+        )
+        db_obj = result.scalars().first()
+        if db_obj is not None:
+            await media_blob.release(db, key=db_obj.logo_key)
+        await commit_or_flush(db)
         return db_obj
 
 
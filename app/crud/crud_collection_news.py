@@ -1,36 +1,63 @@
 import uuid
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import commit_or_flush
+from app.crud.crud_collection_stats import collection_stats
+from app.crud.nested import get_with_parent
+from app.crud.pagination import Keyset
+from app.models.collection import Collection
 from app.models.collection_news import CollectionNews
 from app.schemas.collection_news import CollectionNewsCreate, CollectionNewsUpdate
 
 
 class CRUDCollectionNews:
+    keyset = Keyset(CollectionNews.date, CollectionNews.id, descending=True)
+
     async def get(self, db: AsyncSession, id: uuid.UUID) -> Optional[CollectionNews]:
         result = await db.execute(
             select(CollectionNews).filter(CollectionNews.id == id)
         )
         return result.scalars().first()
 
+    async def get_for_collection(
+        self, db: AsyncSession, *, collection_id: uuid.UUID, news_id: uuid.UUID
+    ) -> Tuple[bool, Optional[CollectionNews]]:
+        """
+        Pobiera news zbiórki w jednym zapytaniu razem ze sprawdzeniem zbiórki.
+        Zwraca (czy zbiórka istnieje, news lub None).
+        """
+        return await get_with_parent(
+            db,
+            parent_id_column=Collection.id,
+            parent_id=collection_id,
+            child=CollectionNews,
+            parent_fk_column=CollectionNews.collection_id,
+            id=news_id,
+        )
+
     async def get_multi_by_collection(
         self,
         db: AsyncSession,
         *,
         collection_id: uuid.UUID,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[CollectionNews]:
-        result = await db.execute(
-            select(CollectionNews)
-            .filter(CollectionNews.collection_id == collection_id)
-            .order_by(CollectionNews.date.desc())  # Sort by date descending
-            .offset(skip)
-            .limit(limit)
+        # Sort by date descending
+        statement = self.keyset.apply(
+            select(CollectionNews).filter(
+                CollectionNews.collection_id == collection_id
+            ),
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
         )
+        result = await db.execute(statement)
         return result.scalars().all()
 
     async def create(
@@ -41,15 +68,21 @@ class CRUDCollectionNews:
         collection_id: uuid.UUID,
         author_id: str
     ) -> CollectionNews:
-        db_obj = CollectionNews(
-            **obj_in.dict(),
-            collection_id=collection_id,
-            author_id=author_id,
-            date=datetime.now()  # Ustaw datę automatycznie
+        result = await db.execute(
+            insert(CollectionNews)
+            .values(
+                **obj_in.dict(),
+                collection_id=collection_id,
+                author_id=author_id,
+                date=datetime.now()  # Ustaw datę automatycznie
+            )
+            .returning(CollectionNews)
         )
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        db_obj = result.scalars().one()
+        await collection_stats.add(
+            db, collection_id=collection_id, news_count=1, last_news_date=db_obj.date
+        )
+        await commit_or_flush(db)
         return db_obj
 
     async def update(
@@ -57,22 +90,33 @@ class CRUDCollectionNews:
     ) -> CollectionNews:
         update_data = obj_in.dict(exclude_unset=True)
         # Zazwyczaj tylko 'content' będzie aktualizowany
-        for field, value in update_data.items():
-            setattr(db_obj, field, value)
         # Ewentualnie zaktualizuj datę modyfikacji, jeśli dodasz takie pole
-        # db_obj.modified_date = datetime.now()
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        # update_data["modified_date"] = datetime.now()
+        if not update_data:
+            return db_obj
+        result = await db.execute(
+            update(CollectionNews)
+            .filter(CollectionNews.id == db_obj.id)
+            .values(**update_data)
+            .returning(CollectionNews),
+            execution_options={"populate_existing": True},
+        )
+        db_obj = result.scalars().one()
+        await commit_or_flush(db)
         return db_obj
 
     async def remove(
         self, db: AsyncSession, *, id: uuid.UUID
     ) -> Optional[CollectionNews]:
-        db_obj = await self.get(db=db, id=id)
+        result = await db.execute(
+            delete(CollectionNews)
+            .filter(CollectionNews.id == id)
+            .returning(CollectionNews)
+        )
+        db_obj = result.scalars().first()
         if db_obj:
-            await db.delete(db_obj)
-            await db.commit()
+            await collection_stats.remove_news(db, collection_id=db_obj.collection_id)
+        await commit_or_flush(db)
         return db_obj
 
 
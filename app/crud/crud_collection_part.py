@@ -1,34 +1,61 @@
 import uuid
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import commit_or_flush
+from app.crud.crud_collection_stats import collection_stats
+from app.crud.nested import get_with_parent
+from app.crud.pagination import Keyset
+from app.models.collection import Collection
 from app.models.collection_part import CollectionPart
 from app.schemas.collection_part import CollectionPartCreate, CollectionPartUpdate
 
 
 class CRUDCollectionPart:
+    keyset = Keyset(CollectionPart.id)
+
     async def get(self, db: AsyncSession, id: uuid.UUID) -> Optional[CollectionPart]:
         result = await db.execute(
             select(CollectionPart).filter(CollectionPart.id == id)
         )
         return result.scalars().first()
 
+    async def get_for_collection(
+        self, db: AsyncSession, *, collection_id: uuid.UUID, part_id: uuid.UUID
+    ) -> Tuple[bool, Optional[CollectionPart]]:
+        """
+        Pobiera część zbiórki w jednym zapytaniu razem ze sprawdzeniem zbiórki.
+        Zwraca (czy zbiórka istnieje, część lub None).
+        """
+        return await get_with_parent(
+            db,
+            parent_id_column=Collection.id,
+            parent_id=collection_id,
+            child=CollectionPart,
+            parent_fk_column=CollectionPart.collection_id,
+            id=part_id,
+        )
+
     async def get_multi_by_collection(
         self,
         db: AsyncSession,
         *,
         collection_id: uuid.UUID,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[CollectionPart]:
-        result = await db.execute(
-            select(CollectionPart)
-            .filter(CollectionPart.collection_id == collection_id)
-            .offset(skip)
-            .limit(limit)
+        statement = self.keyset.apply(
+            select(CollectionPart).filter(
+                CollectionPart.collection_id == collection_id
+            ),
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
         )
+        result = await db.execute(statement)
         return result.scalars().all()
 
     async def create(
@@ -38,30 +65,63 @@ class CRUDCollectionPart:
         obj_in: CollectionPartCreate,
         collection_id: uuid.UUID
     ) -> CollectionPart:
-        db_obj = CollectionPart(**obj_in.dict(), collection_id=collection_id)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        result = await db.execute(
+            insert(CollectionPart)
+            .values(**obj_in.dict(), collection_id=collection_id)
+            .returning(CollectionPart)
+        )
+        db_obj = result.scalars().one()
+        await collection_stats.add(
+            db, collection_id=collection_id, parts_total=db_obj.total_amount
+        )
+        await commit_or_flush(db)
         return db_obj
 
     async def update(
         self, db: AsyncSession, *, db_obj: CollectionPart, obj_in: CollectionPartUpdate
     ) -> CollectionPart:
         update_data = obj_in.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_obj, field, value)
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        if not update_data:
+            return db_obj
+        if "total_amount" in update_data:
+            # Stara kwota z zablokowanego wiersza - delta do parts_total
+            result = await db.execute(
+                select(CollectionPart.total_amount)
+                .filter(CollectionPart.id == db_obj.id)
+                .with_for_update()
+            )
+            old_amount = result.scalar_one()
+        result = await db.execute(
+            update(CollectionPart)
+            .filter(CollectionPart.id == db_obj.id)
+            .values(**update_data)
+            .returning(CollectionPart),
+            execution_options={"populate_existing": True},
+        )
+        db_obj = result.scalars().one()
+        if "total_amount" in update_data:
+            await collection_stats.add(
+                db,
+                collection_id=db_obj.collection_id,
+                parts_total=db_obj.total_amount - old_amount,
+            )
+        await commit_or_flush(db)
         return db_obj
 
     async def remove(
         self, db: AsyncSession, *, id: uuid.UUID
     ) -> Optional[CollectionPart]:
-        db_obj = await self.get(db=db, id=id)
+        result = await db.execute(
+            delete(CollectionPart)
+            .filter(CollectionPart.id == id)
+            .returning(CollectionPart)
+        )
+        db_obj = result.scalars().first()
         if db_obj:
-            await db.delete(db_obj)
-            await db.commit()
+            await collection_stats.add(
+                db, collection_id=db_obj.collection_id, parts_total=-db_obj.total_amount
+            )
+        await commit_or_flush(db)
         return db_obj  # Zwraca usunięty obiekt lub None
 
 
@@ -0,0 +1,214 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional, Sequence
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.collection import Collection
+from app.models.collection_news import CollectionNews
+from app.models.collection_part import CollectionPart
+from app.models.collection_stats import CollectionStats
+from app.models.student_collection import StudentCollection
+
+STATS_FIELDS = (
+    "participants_count",
+    "assigned_amount",
+    "parts_total",
+    "news_count",
+    "last_news_date",
+)
+
+
+class CRUDCollectionStats:
+    """
+    Liczniki w collection_stats są aktualizowane w tej samej transakcji co
+    zapis, który je zmienia (bez commita - commituje metoda CRUD wołająca).
+    Zapisy przesuwają liczniki o deltę (przy zmianie kwoty stara wartość
+    pochodzi z wiersza zablokowanego FOR UPDATE), więc nie nadpisują delt
+    równoległych transakcji. Od zera (refresh) przelicza tylko
+    reconcile_collection_stats.
+    """
+
+    async def get(
+        self, db: AsyncSession, *, collection_id: uuid.UUID
+    ) -> Optional[CollectionStats]:
+        result = await db.execute(
+            select(CollectionStats).filter(
+                CollectionStats.collection_id == collection_id
+            )
+        )
+        return result.scalars().first()
+
+    async def add(
+        self,
+        db: AsyncSession,
+        *,
+        collection_id: uuid.UUID,
+        participants_count: int = 0,
+        assigned_amount: Decimal = Decimal(0),
+        parts_total: Decimal = Decimal(0),
+        news_count: int = 0,
+        last_news_date: Optional[datetime] = None,
+    ) -> None:
+        """Przesuwa liczniki zbiórki o podane delty (INSERT ... ON CONFLICT)."""
+        statement = insert(CollectionStats).values(
+            collection_id=collection_id,
+            participants_count=participants_count,
+            assigned_amount=assigned_amount,
+            parts_total=parts_total,
+            news_count=news_count,
+            last_news_date=last_news_date,
+        )
+        excluded = statement.excluded
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[CollectionStats.collection_id],
+                set_={
+                    "participants_count": CollectionStats.participants_count
+                    + excluded.participants_count,
+                    "assigned_amount": CollectionStats.assigned_amount
+                    + excluded.assigned_amount,
+                    "parts_total": CollectionStats.parts_total + excluded.parts_total,
+                    "news_count": CollectionStats.news_count + excluded.news_count,
+                    # greatest() w Postgresie pomija NULL
+                    "last_news_date": func.greatest(
+                        CollectionStats.last_news_date, excluded.last_news_date
+                    ),
+                },
+            )
+        )
+
+    async def remove_news(self, db: AsyncSession, *, collection_id: uuid.UUID) -> None:
+        """
+        Po usunięciu newsa: news_count o jeden mniej, last_news_date od nowa.
+        Najpierw blokuje wiersz statystyk, żeby max(date) liczyć na migawce
+        z zatwierdzonymi już newsami transakcji, które zdążyły dodać delty.
+        """
+        await db.execute(
+            select(CollectionStats.collection_id)
+            .filter(CollectionStats.collection_id == collection_id)
+            .with_for_update()
+        )
+        await db.execute(
+            update(CollectionStats)
+            .filter(CollectionStats.collection_id == collection_id)
+            .values(
+                news_count=CollectionStats.news_count - 1,
+                last_news_date=select(func.max(CollectionNews.date))
+                .filter(CollectionNews.collection_id == collection_id)
+                .scalar_subquery(),
+            )
+        )
+
+    def _computed(self):
+        """SELECT liczników policzonych od zera ze źródłowych tabel."""
+
+        def scalar(statement, column):
+            return statement.scalar_subquery().label(column)
+
+        return select(
+            Collection.id.label("collection_id"),
+            scalar(
+                select(func.count()).filter(
+                    StudentCollection.collection_id == Collection.id
+                ),
+                "participants_count",
+            ),
+            scalar(
+                select(
+                    func.coalesce(func.sum(StudentCollection.total_amount), 0)
+                ).filter(StudentCollection.collection_id == Collection.id),
+                "assigned_amount",
+            ),
+            scalar(
+                select(func.coalesce(func.sum(CollectionPart.total_amount), 0)).filter(
+                    CollectionPart.collection_id == Collection.id
+                ),
+                "parts_total",
+            ),
+            scalar(
+                select(func.count()).filter(
+                    CollectionNews.collection_id == Collection.id
+                ),
+                "news_count",
+            ),
+            scalar(
+                select(func.max(CollectionNews.date)).filter(
+                    CollectionNews.collection_id == Collection.id
+                ),
+                "last_news_date",
+            ),
+        )
+
+    async def refresh(
+        self, db: AsyncSession, *, collection_ids: Sequence[uuid.UUID]
+    ) -> None:
+        """
+        Przelicza wiersze podanych zbiórek od zera (INSERT ... SELECT ... ON
+        CONFLICT). Nadpisuje liczniki wartościami z migawki zapytania, więc
+        nie nadaje się do ścieżek zapisu - tylko do naprawy rozjazdów.
+        """
+        if not collection_ids:
+            return
+        computed = self._computed().filter(Collection.id.in_(collection_ids))
+        statement = insert(CollectionStats).from_select(
+            ["collection_id", *STATS_FIELDS], computed
+        )
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[CollectionStats.collection_id],
+                set_={
+                    field: getattr(statement.excluded, field) for field in STATS_FIELDS
+                },
+            )
+        )
+
+    async def find_drift(self, db: AsyncSession) -> List[dict]:
+        """
+        Porównuje zapisane liczniki z policzonymi od zera dla wszystkich
+        zbiórek. Zwraca listę rozjazdów {collection_id, stored, expected}
+        (stored=None, gdy brakuje wiersza w collection_stats).
+        """
+        computed = self._computed().subquery()
+        statement = (
+            select(computed, CollectionStats)
+            .outerjoin(
+                CollectionStats,
+                CollectionStats.collection_id == computed.c.collection_id,
+            )
+            .filter(
+                or_(
+                    CollectionStats.collection_id == None,
+                    *(
+                        getattr(CollectionStats, field).is_distinct_from(
+                            getattr(computed.c, field)
+                        )
+                        for field in STATS_FIELDS
+                    ),
+                )
+            )
+            .order_by(computed.c.collection_id)
+        )
+        result = await db.execute(statement)
+
+        drift = []
+        for row in result.all():
+            stats = row.CollectionStats
+            drift.append(
+                {
+                    "collection_id": row.collection_id,
+                    "stored": (
+                        {field: getattr(stats, field) for field in STATS_FIELDS}
+                        if stats is not None
+                        else None
+                    ),
+                    "expected": {field: row._mapping[field] for field in STATS_FIELDS},
+                }
+            )
+        return drift
+
+
+collection_stats = CRUDCollectionStats()
@@ -0,0 +1,128 @@
+import re
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import delete, exists, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.collection import Collection
+from app.models.media_blob import MediaBlob
+from app.models.school_class import SchoolClass
+
+# Ostatni segment ścieżki URL-a bloba (bez hosta i prefiksu API, które
+# zależą od konfiguracji); miniatury blobs/<sha256>/<rozmiar>.webp nie pasują
+_BLOB_KEY_RE = re.compile(r"(?:^|/)(blobs/[^/?#]+)(?:[?#].*)?$")
+
+
+def key_from_url(url: Any) -> Optional[str]:
+    """Klucz bloba z URL-a awatara/logo albo None (np. zewnętrzny obrazek)."""
+    if url is None:
+        return None
+    match = _BLOB_KEY_RE.search(str(url))
+    return match.group(1) if match else None
+
+
+class CRUDMediaBlob:
+    """
+    Referencje do blobów (SchoolClass.avatar_key, Collection.logo_key) są
+    liczone po kluczu, w tej samej transakcji co zapis, który je zmienia
+    (bez commita - commituje metoda CRUD wołająca).
+    """
+
+    async def register(
+        self,
+        db: AsyncSession,
+        *,
+        key: str,
+        sha256: str,
+        size: int,
+        content_type: str,
+    ) -> None:
+        """
+        Zapisuje blob albo odświeża updated_at istniejącego. Blokuje wiersz
+        do końca transakcji, więc GC nie usunie bloba, zanim zapis
+        wskazujący na niego zdąży dodać referencję.
+        """
+        statement = insert(MediaBlob).values(
+            key=key,
+            sha256=sha256,
+            size=size,
+            content_type=content_type,
+            ref_count=0,
+            updated_at=datetime.now(),
+        )
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[MediaBlob.key],
+                set_={"updated_at": statement.excluded.updated_at},
+            )
+        )
+
+    async def add_ref(self, db: AsyncSession, *, key: Optional[str]) -> Optional[str]:
+        """Zwraca klucz, jeśli blob istnieje (referencja policzona), inaczej None."""
+        if key is None:
+            return None
+        result = await db.execute(
+            update(MediaBlob)
+            .filter(MediaBlob.key == key)
+            .values(ref_count=MediaBlob.ref_count + 1, updated_at=datetime.now())
+            .returning(MediaBlob.key)
+        )
+        return result.scalar_one_or_none()
+
+    async def release(self, db: AsyncSession, *, key: Optional[str]) -> None:
+        if key is None:
+            return
+        await db.execute(
+            update(MediaBlob)
+            .filter(MediaBlob.key == key, MediaBlob.ref_count > 0)
+            .values(ref_count=MediaBlob.ref_count - 1, updated_at=datetime.now())
+        )
+
+    async def replace_ref(
+        self, db: AsyncSession, *, old: Optional[str], new: Optional[str]
+    ) -> Optional[str]:
+        """Przeniesienie referencji przy zmianie awatara/logo; zwraca nowy klucz."""
+        if old == new:
+            return new
+        await self.release(db, key=old)
+        return await self.add_ref(db, key=new)
+
+    async def get_orphans(
+        self, db: AsyncSession, *, older_than: datetime, limit: int = 1000
+    ) -> List[MediaBlob]:
+        result = await db.execute(
+            select(MediaBlob)
+            .filter(MediaBlob.ref_count == 0, MediaBlob.updated_at < older_than)
+            .order_by(MediaBlob.updated_at)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def remove_orphans(
+        self, db: AsyncSession, *, keys: Sequence[str], older_than: datetime
+    ) -> List[str]:
+        """
+        Usuwa wiersze blobów, które nadal nie mają referencji (warunki
+        sprawdzane ponownie w DELETE). Usunięte wiersze pozostają
+        zablokowane do commita - obiekty w MinIO trzeba usunąć przed nim.
+        Zwraca klucze faktycznie usuniętych.
+        """
+        if not keys:
+            return []
+        result = await db.execute(
+            delete(MediaBlob)
+            .filter(
+                MediaBlob.key.in_(keys),
+                MediaBlob.ref_count == 0,
+                MediaBlob.updated_at < older_than,
+                ~exists().where(SchoolClass.avatar_key == MediaBlob.key),
+                ~exists().where(Collection.logo_key == MediaBlob.key),
+            )
+            .returning(MediaBlob.key)
+        )
+        return list(result.scalars().all())
+
+
+media_blob = CRUDMediaBlob()
@@ -1,49 +1,120 @@
 import uuid
 from typing import List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import commit_or_flush
+from app.crud.crud_media_blob import key_from_url, media_blob
+from app.crud.pagination import Keyset
 from app.models.school_class import SchoolClass
 from app.schemas.school_class import SchoolClassCreate, SchoolClassUpdate
 
 
 class CRUDSchoolClass:
+    keyset = Keyset(SchoolClass.id)
+
     async def get(self, db: AsyncSession, id: uuid.UUID) -> Optional[SchoolClass]:
         result = await db.execute(select(SchoolClass).filter(SchoolClass.id == id))
         return result.scalars().first()
 
     async def get_multi(
-        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[SchoolClass]:
-        result = await db.execute(select(SchoolClass).offset(skip).limit(limit))
+        statement = self.keyset.apply(
+            select(SchoolClass), cursor=cursor, skip=skip, limit=limit
+        )
+        result = await db.execute(statement)
         return result.scalars().all()
 
     async def create(
         self, db: AsyncSession, *, obj_in: SchoolClassCreate
     ) -> SchoolClass:
-        db_obj = SchoolClass(**obj_in.dict())
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        values = obj_in.dict()
+        if values.get("avatar") is not None:
+            values["avatar"] = str(values["avatar"])
+        values["avatar_key"] = await media_blob.add_ref(
+            db, key=key_from_url(values.get("avatar"))
+        )
+        result = await db.execute(
+            insert(SchoolClass).values(**values).returning(SchoolClass)
+        )
+        db_obj = result.scalars().one()
+        await commit_or_flush(db)
         return db_obj
 
     async def update(
         self, db: AsyncSession, *, db_obj: SchoolClass, obj_in: SchoolClassUpdate
     ) -> SchoolClass:
         update_data = obj_in.dict(exclude_unset=True)
-        for field in update_data:
-            setattr(db_obj, field, update_data[field])
-        db.add(db_obj)
-        await db.commit()
-        await db.refresh(db_obj)
+        if not update_data:
+            return db_obj
+        if "avatar" in update_data:
+            avatar = update_data["avatar"]
+            update_data["avatar"] = str(avatar) if avatar is not None else None
+            if update_data["avatar"] != db_obj.avatar:
+                # Miniatury dotyczyły poprzedniego awatara
+                update_data["avatar_variants"] = None
+                update_data["avatar_key"] = await media_blob.replace_ref(
+                    db,
+                    old=db_obj.avatar_key,
+                    new=key_from_url(update_data["avatar"]),
+                )
+        result = await db.execute(
+            update(SchoolClass)
+            .filter(SchoolClass.id == db_obj.id)
+            .values(**update_data)
+            .returning(SchoolClass),
+            execution_options={"populate_existing": True},
+        )
+        db_obj = result.scalars().one()
+        await commit_or_flush(db)
         return db_obj
 
+    async def set_avatar(
+        self, db: AsyncSession, *, db_obj: SchoolClass, avatar: str, avatar_key: str
+    ) -> SchoolClass:
+        """Ustawia awatar na zarejestrowany blob (avatar_key) i przenosi referencję."""
+        avatar_key = await media_blob.replace_ref(
+            db, old=db_obj.avatar_key, new=avatar_key
+        )
+        result = await db.execute(
+            update(SchoolClass)
+            .filter(SchoolClass.id == db_obj.id)
+            .values(avatar=avatar, avatar_key=avatar_key, avatar_variants=None)
+            .returning(SchoolClass),
+            execution_options={"populate_existing": True},
+        )
+        db_obj = result.scalars().one()
+        await commit_or_flush(db)
+        return db_obj
+
+    async def set_avatar_variants(
+        self, db: AsyncSession, *, id: uuid.UUID, avatar_key: str, variants: dict
+    ) -> bool:
+        """Zapisuje miniatury, o ile awatar nie zmienił się w międzyczasie."""
+        result = await db.execute(
+            update(SchoolClass)
+            .filter(SchoolClass.id == id, SchoolClass.avatar_key == avatar_key)
+            .values(avatar_variants=variants)
+        )
+        await commit_or_flush(db)
+        return result.rowcount > 0
+
     async def remove(self, db: AsyncSession, *, id: uuid.UUID) -> Optional[SchoolClass]:
-        db_obj = await self.get(db=db, id=id)
-        if db_obj:
-            await db.delete(db_obj)
-            await db.commit()
+        # Powiązane rekordy usuwa ON DELETE CASCADE w bazie
+        result = await db.execute(
+            delete(SchoolClass).filter(SchoolClass.id == id).returning(SchoolClass)
+        )
+        db_obj = result.scalars().first()
+        if db_obj is not None:
+            await media_blob.release(db, key=db_obj.avatar_key)
+        await commit_or_flush(db)
         return db_obj  # Return the deleted object or None
 
 
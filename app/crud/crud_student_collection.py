@@ -1,9 +1,20 @@
 import uuid
-from typing import List, Optional, Tuple
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
 
-from sqlalchemy import select, delete
+from sqlalchemy import case, exists, func, literal, or_, select, delete, true, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import commit_or_flush
+from app.crud.crud_collection_stats import collection_stats
+from app.crud.nested import get_with_parent
+from app.crud.pagination import Keyset
+from app.models.class_student import ClassStudent
+from app.models.collection import Collection, CollectionStatus
+from app.models.collection_part import CollectionPart, PaymentType
+from app.models.enums import ClassStudentStatus
 from app.models.student_collection import StudentCollection
 from app.schemas.student_collection import (
     StudentCollectionCreate,
@@ -12,6 +23,9 @@ from app.schemas.student_collection import (
 
 
 class CRUDStudentCollection:
+    keyset_by_collection = Keyset(StudentCollection.student_id)
+    keyset_by_student = Keyset(StudentCollection.collection_id)
+
     async def get(
         self, db: AsyncSession, *, student_id: str, collection_id: uuid.UUID
     ) -> Optional[StudentCollection]:
@@ -22,31 +36,60 @@ class CRUDStudentCollection:
         )
         return result.scalars().first()
 
+    async def get_for_collection(
+        self, db: AsyncSession, *, collection_id: uuid.UUID, student_id: str
+    ) -> Tuple[bool, Optional[StudentCollection]]:
+        """
+        Pobiera uczestnictwo studenta w jednym zapytaniu razem ze sprawdzeniem
+        zbiórki. Zwraca (czy zbiórka istnieje, uczestnictwo lub None).
+        """
+        return await get_with_parent(
+            db,
+            parent_id_column=Collection.id,
+            parent_id=collection_id,
+            child=StudentCollection,
+            parent_fk_column=StudentCollection.collection_id,
+            student_id=student_id,
+        )
+
     async def get_multi_by_collection(
         self,
         db: AsyncSession,
         *,
         collection_id: uuid.UUID,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[StudentCollection]:
-        result = await db.execute(
-            select(StudentCollection)
-            .filter(StudentCollection.collection_id == collection_id)
-            .offset(skip)
-            .limit(limit)
+        statement = self.keyset_by_collection.apply(
+            select(StudentCollection).filter(
+                StudentCollection.collection_id == collection_id
+            ),
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
         )
+        result = await db.execute(statement)
         return result.scalars().all()
 
     async def get_multi_by_student(
-        self, db: AsyncSession, *, student_id: str, skip: int = 0, limit: int = 100
+        self,
+        db: AsyncSession,
+        *,
+        student_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None
     ) -> List[StudentCollection]:
-        result = await db.execute(
-            select(StudentCollection)
-            .filter(StudentCollection.student_id == student_id)
-            .offset(skip)
-            .limit(limit)
+        statement = self.keyset_by_student.apply(
+            select(StudentCollection).filter(
+                StudentCollection.student_id == student_id
+            ),
+            cursor=cursor,
+            skip=skip,
+            limit=limit,
         )
+        result = await db.execute(statement)
         return result.scalars().all()
 
     async def create(
@@ -62,16 +105,200 @@ class CRUDStudentCollection:
         # if existing:
         #     raise ValueError("Student already participating in this collection") # Lub inna obsługa błędu
 
-        db_obj = StudentCollection(
-            student_id=obj_in.student_id,
+        result = await db.execute(
+            insert(StudentCollection)
+            .values(
+                student_id=obj_in.student_id,
+                collection_id=collection_id,
+                total_amount=obj_in.total_amount,
+            )
+            .returning(StudentCollection)
+        )
+        db_obj = result.scalars().one()
+        await collection_stats.add(
+            db,
             collection_id=collection_id,
-            total_amount=obj_in.total_amount,
+            participants_count=1,
+            assigned_amount=db_obj.total_amount,
+        )
+        await commit_or_flush(db)
+        return db_obj
+
+    def _split(self, collection_id: uuid.UUID):
+        """
+        Podstawa podziału kwot zbiórki: podzapytanie z sumą części PERSON_FIXED
+        (parts.c.person_fixed) i wyrażenie z kwotą TOTAL_FIXED do podziału
+        między uczestników. Wymaga złączenia z Collection zbiórki.
+        """
+        parts = (
+            select(
+                func.count(CollectionPart.id).label("parts_count"),
+                func.coalesce(
+                    func.sum(CollectionPart.total_amount).filter(
+                        CollectionPart.payment_type == PaymentType.PERSON_FIXED
+                    ),
+                    0,
+                ).label("person_fixed"),
+                func.coalesce(
+                    func.sum(CollectionPart.total_amount).filter(
+                        CollectionPart.payment_type == PaymentType.TOTAL_FIXED
+                    ),
+                    0,
+                ).label("total_fixed"),
+            )
+            .filter(CollectionPart.collection_id == collection_id)
+            .subquery()
+        )
+        total_fixed = case(
+            (parts.c.parts_count == 0, Collection.total_amount),
+            else_=parts.c.total_fixed,
+        )
+        return parts, total_fixed
+
+    async def _lock_amounts(
+        self,
+        db: AsyncSession,
+        *,
+        collection_id: uuid.UUID,
+        student_ids: Optional[List[str]] = None
+    ) -> Dict[str, Decimal]:
+        """
+        Blokuje (FOR UPDATE) wiersze uczestnictw zbiórki do końca transakcji
+        i zwraca ich kwoty {student_id: total_amount} - stare wartości do delt
+        w collection_stats.
+        """
+        statement = select(
+            StudentCollection.student_id, StudentCollection.total_amount
+        ).filter(StudentCollection.collection_id == collection_id)
+        if student_ids is not None:
+            statement = statement.filter(StudentCollection.student_id.in_(student_ids))
+        result = await db.execute(statement.with_for_update())
+        return dict(result.all())
+
+    async def create_for_active_class_students(
+        self, db: AsyncSession, *, collection_id: uuid.UUID, class_id: str
+    ) -> int:
+        """
+        Tworzy wpisy uczestnictwa dla wszystkich aktywnych uczniów klasy jednym
+        INSERT ... SELECT (bez commita - w transakcji wołającego).
+
+        Kwota ucznia = suma części PERSON_FIXED + suma części TOTAL_FIXED
+        podzielona po równo między uczniów. Zbiórka bez części jest traktowana
+        jak jedna część TOTAL_FIXED na Collection.total_amount.
+        Zwraca liczbę utworzonych wpisów.
+        """
+        try:
+            class_uuid = uuid.UUID(class_id)
+        except ValueError:
+            return 0  # Collection.class_id to string, klasa spoza tego serwisu
+
+        students = (
+            select(ClassStudent.student_id)
+            .filter(
+                ClassStudent.class_id == class_uuid,
+                ClassStudent.status == ClassStudentStatus.ACTIVE,
+                or_(ClassStudent.end == None, ClassStudent.end > datetime.now()),
+            )
+            .distinct()
+            .subquery()
+        )
+        parts, total_fixed = self._split(collection_id)
+        amount = func.round(parts.c.person_fixed + total_fixed / func.count().over(), 2)
+
+        statement = (
+            insert(StudentCollection)
+            .from_select(
+                ["student_id", "collection_id", "total_amount"],
+                select(students.c.student_id, literal(collection_id), amount)
+                .select_from(students)
+                .join(parts, true())
+                .join(Collection, Collection.id == collection_id),
+            )
+            .on_conflict_do_nothing(
+                index_elements=[
+                    StudentCollection.student_id,
+                    StudentCollection.collection_id,
+                ]
+            )
+            .returning(StudentCollection.total_amount)
+        )
+        result = await db.execute(statement)
+        amounts = result.scalars().all()
+        if amounts:
+            await collection_stats.add(
+                db,
+                collection_id=collection_id,
+                participants_count=len(amounts),
+                assigned_amount=sum(amounts),
+            )
+        return len(amounts)
+
+    async def remove_for_ended_student(
+        self, db: AsyncSession, *, student_id: str, class_id: uuid.UUID
+    ) -> int:
+        """
+        Usuwa uczestnictwo ucznia, który odszedł z klasy, w jej zbiórkach
+        jeszcze nierozpoczętych (NEW), przelicza kwoty pozostałych uczestników
+        tak jak przy tworzeniu zbiórki (TOTAL_FIXED dzielone po równo między
+        pozostałych, ręczne zmiany kwot w tych zbiórkach przepadają) i koryguje
+        statystyki (bez commita - w transakcji wołającego). Zbiórki w toku
+        zostają bez zmian, tak samo gdy uczeń ma w klasie inne aktywne
+        przypisanie.
+        Zwraca liczbę usuniętych wpisów.
+        """
+        still_active = exists().where(
+            ClassStudent.student_id == student_id,
+            ClassStudent.class_id == class_id,
+            ClassStudent.status == ClassStudentStatus.ACTIVE,
         )
-        db.add(db_obj)
-        await db.commit()
-        # Nie ma auto-generowanego ID, więc refresh nie jest konieczny dla kluczy
-        # await db.refresh(db_obj) # Nie zadziała bez primary key ID
-        return db_obj  # Zwraca obiekt z danymi wejściowymi
+        result = await db.execute(
+            delete(StudentCollection)
+            .filter(
+                StudentCollection.student_id == student_id,
+                StudentCollection.collection_id.in_(
+                    select(Collection.id).filter(
+                        Collection.class_id == str(class_id),
+                        Collection.status == CollectionStatus.NEW,
+                    )
+                ),
+                ~still_active,
+            )
+            .returning(StudentCollection.collection_id, StudentCollection.total_amount)
+        )
+        removed = result.all()
+        for collection_id, total_amount in removed:
+            assigned_delta = -total_amount
+            old_amounts = await self._lock_amounts(db, collection_id=collection_id)
+            if old_amounts:
+                # Część TOTAL_FIXED dzielimy od nowa między pozostałych
+                parts, total_fixed = self._split(collection_id)
+                share = (
+                    select(
+                        func.round(
+                            parts.c.person_fixed + total_fixed / len(old_amounts), 2
+                        )
+                    )
+                    .select_from(parts)
+                    .join(Collection, Collection.id == collection_id)
+                    .scalar_subquery()
+                )
+                result = await db.execute(
+                    update(StudentCollection)
+                    .filter(StudentCollection.collection_id == collection_id)
+                    .values(total_amount=share)
+                    .returning(StudentCollection.total_amount),
+                    execution_options={"synchronize_session": "fetch"},
+                )
+                assigned_delta += sum(result.scalars().all()) - sum(
+                    old_amounts.values()
+                )
+            await collection_stats.add(
+                db,
+                collection_id=collection_id,
+                participants_count=-1,
+                assigned_amount=assigned_delta,
+            )
+        return len(removed)
 
     async def update(
         self,
@@ -82,32 +309,54 @@ class CRUDStudentCollection:
     ) -> StudentCollection:
         """Aktualizuje dane uczestnictwa studenta (głównie kwotę)."""
         update_data = obj_in.dict(exclude_unset=True)
-        if "total_amount" in update_data:
-            db_obj.total_amount = update_data["total_amount"]
-
-        db.add(
-            db_obj
-        )  # Mimo że obiekt jest już śledzony, dodanie go oznacza, że ma być utrwalony
-        await db.commit()
-        # await db.refresh(db_obj) # Nie zadziała bez primary key ID
+        if "total_amount" not in update_data:
+            return db_obj
+
+        old_amounts = await self._lock_amounts(
+            db, collection_id=db_obj.collection_id, student_ids=[db_obj.student_id]
+        )
+        result = await db.execute(
+            update(StudentCollection)
+            .filter(
+                StudentCollection.student_id == db_obj.student_id,
+                StudentCollection.collection_id == db_obj.collection_id,
+            )
+            .values(total_amount=update_data["total_amount"])
+            .returning(StudentCollection),
+            execution_options={"populate_existing": True},
+        )
+        db_obj = result.scalars().one()
+        await collection_stats.add(
+            db,
+            collection_id=db_obj.collection_id,
+            assigned_amount=db_obj.total_amount - old_amounts[db_obj.student_id],
+        )
+        await commit_or_flush(db)
         return db_obj
 
     async def remove(
         self, db: AsyncSession, *, student_id: str, collection_id: uuid.UUID
     ) -> Optional[StudentCollection]:
         """Usuwa wpis uczestnictwa studenta w zbiórce."""
-        db_obj = await self.get(
-            db=db, student_id=student_id, collection_id=collection_id
+        result = await db.execute(
+            delete(StudentCollection)
+            .filter(
+                StudentCollection.student_id == student_id,
+                StudentCollection.collection_id == collection_id,
+            )
+            .returning(StudentCollection)
         )
+        db_obj = result.scalars().first()
         if db_obj:
-            # SQLAlchemy < 2.0 może wymagać innego podejścia do delete na composite key
-            # W nowszych wersjach:
-            await db.delete(db_obj)
-            await db.commit()
-            return db_obj  # Zwraca obiekt, który został usunięty
-        return None
-
-    # Opcjonalna metoda Upsert (Create or Update)
+            await collection_stats.add(
+                db,
+                collection_id=collection_id,
+                participants_count=-1,
+                assigned_amount=-db_obj.total_amount,
+            )
+        await commit_or_flush(db)
+        return db_obj  # Zwraca obiekt, który został usunięty
+
     async def upsert(
         self,
         db: AsyncSession,
@@ -115,16 +364,93 @@ class CRUDStudentCollection:
         obj_in: StudentCollectionCreate,
         collection_id: uuid.UUID
     ) -> StudentCollection:
-        db_obj = await self.get(
-            db=db, student_id=obj_in.student_id, collection_id=collection_id
+        """Create or update jednym INSERT ... ON CONFLICT DO UPDATE ... RETURNING."""
+        db_objs = await self.bulk_upsert(
+            db=db, objs_in=[obj_in], collection_id=collection_id
         )
-        if db_obj:
-            # Update existing
-            update_schema = StudentCollectionUpdate(total_amount=obj_in.total_amount)
-            return await self.update(db=db, db_obj=db_obj, obj_in=update_schema)
-        else:
-            # Create new
-            return await self.create(db=db, obj_in=obj_in, collection_id=collection_id)
+        return db_objs[0]
+
+    async def bulk_upsert(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: List[StudentCollectionCreate],
+        collection_id: uuid.UUID
+    ) -> List[StudentCollection]:
+        """
+        Create or update wielu uczestnictw: nowe wiersze jednym
+        INSERT ... ON CONFLICT DO NOTHING ... RETURNING, pozostałe jednym
+        UPDATE po zablokowaniu ich starych kwot (delty do collection_stats).
+        Przy powtórzonym student_id wygrywa ostatni wpis.
+        """
+        amounts = {obj_in.student_id: obj_in.total_amount for obj_in in objs_in}
+        if not amounts:
+            return []
+
+        result = await db.execute(
+            insert(StudentCollection)
+            .values(
+                [
+                    {
+                        "student_id": student_id,
+                        "collection_id": collection_id,
+                        "total_amount": total_amount,
+                    }
+                    for student_id, total_amount in amounts.items()
+                ]
+            )
+            .on_conflict_do_nothing(
+                index_elements=[
+                    StudentCollection.student_id,
+                    StudentCollection.collection_id,
+                ]
+            )
+            .returning(StudentCollection),
+            execution_options={"populate_existing": True},
+        )
+        created = result.scalars().all()
+        participants_delta = len(created)
+        assigned_delta = sum(db_obj.total_amount for db_obj in created)
+
+        existing = set(amounts) - {db_obj.student_id for db_obj in created}
+        updated = []
+        if existing:
+            old_amounts = await self._lock_amounts(
+                db, collection_id=collection_id, student_ids=list(existing)
+            )
+            result = await db.execute(
+                update(StudentCollection)
+                .filter(
+                    StudentCollection.collection_id == collection_id,
+                    StudentCollection.student_id.in_(existing),
+                )
+                .values(
+                    total_amount=case(
+                        {student_id: amounts[student_id] for student_id in existing},
+                        value=StudentCollection.student_id,
+                    )
+                )
+                .returning(StudentCollection),
+                execution_options={
+                    "populate_existing": True,
+                    "synchronize_session": "fetch",
+                },
+            )
+            updated = result.scalars().all()
+            assigned_delta += sum(
+                db_obj.total_amount - old_amounts[db_obj.student_id]
+                for db_obj in updated
+            )
+
+        if created or updated:
+            await collection_stats.add(
+                db,
+                collection_id=collection_id,
+                participants_count=participants_delta,
+                assigned_amount=assigned_delta,
+            )
+        await commit_or_flush(db)
+        return [*created, *updated]
 
 
 student_collection = CRUDStudentCollection()
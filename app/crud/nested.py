@@ -0,0 +1,40 @@
+from typing import Any, Optional, Tuple, Type, TypeVar
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+Child = TypeVar("Child")
+
+
+async def get_with_parent(
+    db: AsyncSession,
+    *,
+    parent_id_column: Any,
+    parent_id: Any,
+    child: Type[Child],
+    parent_fk_column: Any,
+    **child_filters: Any,
+) -> Tuple[bool, Optional[Child]]:
+    """
+    Pobiera zasób zagnieżdżony (np. część zbiórki) w jednym zapytaniu razem
+    ze sprawdzeniem rodzica: rodzic LEFT JOIN dziecko dopasowane po kluczu
+    obcym i child_filters. Zwraca (czy rodzic istnieje, dziecko lub None).
+    """
+    result = await db.execute(
+        select(parent_id_column, child)
+        .outerjoin(
+            child,
+            and_(
+                parent_fk_column == parent_id_column,
+                *(
+                    getattr(child, name) == value
+                    for name, value in child_filters.items()
+                ),
+            ),
+        )
+        .filter(parent_id_column == parent_id)
+    )
+    row = result.first()
+    if row is None:
+        return False, None
+    return True, row[1]
@@ -0,0 +1,92 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import Select, tuple_
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _load_value(column, value: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    return python_type(value)
+
+
+class Keyset:
+    """
+    Stronicowanie po kluczu (keyset / cursor) zamiast offset.
+
+    Kursor to zakodowane wartości kolumn klucza ostatniego wiersza strony,
+    kolejna strona zaczyna się od `WHERE (kolumny) < (wartości)` (lub `>`),
+    więc koszt zapytania nie rośnie z numerem strony. Ostatnia kolumna
+    klucza musi być unikalna (np. id), żeby kolejność była stabilna.
+    """
+
+    def __init__(self, *columns, descending: bool = False) -> None:
+        self.columns = columns
+        self.descending = descending
+
+    def encode(self, obj: Any) -> str:
+        values = [_dump_value(getattr(obj, column.key)) for column in self.columns]
+        raw = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode(self, cursor: str) -> List[Any]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise ValueError("cursor has wrong number of values")
+            return [
+                _load_value(column, value)
+                for column, value in zip(self.columns, values)
+            ]
+        except (ValueError, TypeError, binascii.Error) as e:
+            raise InvalidCursorError(f"Invalid pagination cursor: {cursor}") from e
+
+    def apply(
+        self,
+        statement: Select,
+        *,
+        cursor: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> Select:
+        """Dodaje sortowanie po kluczu oraz kursor (jeśli podany) albo skip."""
+        if self.descending:
+            statement = statement.order_by(*(column.desc() for column in self.columns))
+        else:
+            statement = statement.order_by(*self.columns)
+
+        if cursor is None:
+            return statement.offset(skip).limit(limit)
+
+        key = tuple_(*self.columns)
+        values = tuple_(*self.decode(cursor))
+        statement = statement.filter(key < values if self.descending else key > values)
+        return statement.limit(limit)
+
+    def next_cursor(self, items: Sequence[Any], limit: int) -> Optional[str]:
+        """Kursor następnej strony lub None, jeśli to była ostatnia strona."""
+        if not items or len(items) < limit:
+            return None
+        return self.encode(items[-1])
@@ -1,2 +1,2 @@
-from .db import DatabaseDep
+from .db import DatabaseDep, ReadDatabaseDep
 from .auth import CurrentUserDep
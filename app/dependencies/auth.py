@@ -1,6 +1,8 @@
-from typing import Annotated
-from fastapi import Depends
+import secrets
+from typing import Annotated, Optional
+from fastapi import Depends, Header, HTTPException, status
 
+from app.core.config import INTERNAL_API_TOKEN
 from app.core.security import verify_token
 
 
@@ -9,3 +11,19 @@ async def get_current_user(user=Depends(verify_token)):
 
 
 CurrentUserDep = Annotated[dict, Depends(get_current_user)]
+
+
+async def verify_internal_token(
+    x_internal_token: Annotated[Optional[str], Header()] = None,
+) -> None:
+    """Endpointy dla innych serwisów - wspólny sekret w nagłówku X-Internal-Token."""
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Internal API is disabled"
+        )
+    if not x_internal_token or not secrets.compare_digest(
+        x_internal_token, INTERNAL_API_TOKEN
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid internal token"
+        )
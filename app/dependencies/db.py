@@ -1,17 +1,54 @@
-from typing import Annotated
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
-
-
-async def get_db():
-    engine = create_async_engine(DATABASE_URL, echo=True)
-    session_local = sessionmaker(
-        bind=engine, class_=AsyncSession, expire_on_commit=False
-    )
+import logging
+from typing import Annotated, Optional
+from fastapi import Depends, Request
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import (
+    get_read_session_factory,
+    get_session_factory,
+    recent_writes,
+)
+from app.dependencies.auth import CurrentUserDep
+
+logger = logging.getLogger(__name__)
+
+
+async def get_db(request: Request):
+    session_local = get_session_factory()
     async with session_local() as session:
+        # Po commicie odczyty zalogowanego użytkownika (jeśli jest) przez
+        # chwilę idą na primary
+        session.info["request_state"] = request.state
+        yield session
+
+
+async def _open_read_session(user_id: Optional[str]) -> AsyncSession:
+    replica_session_local = get_read_session_factory()
+    if replica_session_local is not None and not recent_writes.is_recent(user_id):
+        session = replica_session_local()
+        try:
+            await session.connection()
+            return session
+        except (exc.DBAPIError, OSError):
+            logger.warning("Read replica unavailable, falling back to primary")
+            await session.close()
+
+    return get_session_factory()()
+
+
+async def get_read_db(current_user: CurrentUserDep):
+    """
+    Sesja tylko do odczytu: replika, jeśli jest skonfigurowana i dostępna,
+    w przeciwnym razie primary. Tuż po własnym zapisie użytkownik czyta
+    z primary (read-your-writes).
+    """
+    session = await _open_read_session(current_user.get("sub"))
+    try:
         yield session
+    finally:
+        await session.close()
 
 
 DatabaseDep = Annotated[AsyncSession, Depends(get_db)]
+ReadDatabaseDep = Annotated[AsyncSession, Depends(get_read_db)]
@@ -0,0 +1,33 @@
+from typing import Annotated, Iterable, List, Optional
+
+from fastapi import HTTPException, Query, status
+
+ExpandQuery = Annotated[
+    Optional[str],
+    Query(
+        description=(
+            "Comma separated relationships to include in the response, "
+            "e.g. 'parts,news,students'."
+        )
+    ),
+]
+
+
+def parse_expand(expand: Optional[str], allowed: Iterable[str]) -> List[str]:
+    """Rozbija ?expand=a,b na listę nazw, nieznane nazwy -> 400."""
+    if not expand:
+        return []
+    names = list(
+        dict.fromkeys(name.strip() for name in expand.split(",") if name.strip())
+    )
+    allowed = list(allowed)
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Cannot expand: {', '.join(unknown)}. "
+                f"Allowed values: {', '.join(allowed)}"
+            ),
+        )
+    return names
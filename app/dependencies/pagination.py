@@ -0,0 +1,25 @@
+from typing import Annotated, Any, Optional, Sequence
+
+from fastapi import Query, Response
+
+from app.crud.pagination import Keyset
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+CursorQuery = Annotated[
+    Optional[str],
+    Query(
+        description=(
+            f"Opaque cursor taken from the {NEXT_CURSOR_HEADER} header of the "
+            "previous page. When given, 'skip' is ignored."
+        )
+    ),
+]
+
+
+def set_next_cursor(
+    response: Response, keyset: Keyset, items: Sequence[Any], limit: int
+) -> None:
+    next_cursor = keyset.next_cursor(items, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
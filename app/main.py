@@ -1,13 +1,20 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 
 from app.services.elasticsearch import (
     init_indices,
     get_es_instance,
     wait_for_elasticsearch,
 )
-from app.services.minio_api import init_minio_bucket
+from app.core.database import dispose_engine, init_engine
+from app.core.security import jwks_provider
+from app.crud.pagination import InvalidCursorError
+from app.services.images import shutdown_image_pool
+from app.services.minio_api import init_minio_bucket, shutdown_minio_pool
+from app.services import user_service_api
+from app.services.keycloak_api import keycloak_admin
 from app.api import api_router
 
 es = get_es_instance()
@@ -20,11 +27,39 @@ async def lifespan(_: FastAPI):
 
     await init_indices(es)
 
-    init_minio_bucket()
+    await init_minio_bucket()
+
+    init_engine()
+
+    user_service_api.init_client()
+
+    if jwks_provider is not None:
+        await jwks_provider.start()
 
     yield
 
+    if jwks_provider is not None:
+        await jwks_provider.stop()
+
+    await user_service_api.close_client()
+
+    await keycloak_admin.close()
+
+    shutdown_image_pool()
+
+    shutdown_minio_pool()
+
+    await dispose_engine()
+
 
 app = FastAPI(lifespan=lifespan)
 
+
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor_handler(_: Request, exc: InvalidCursorError):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)}
+    )
+
+
 app.include_router(api_router, prefix="/api/v1")
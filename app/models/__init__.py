@@ -4,5 +4,7 @@ from .class_student import ClassStudent
 from .collection_news import CollectionNews
 from .collection_part import CollectionPart
 from .collection import Collection
+from .collection_stats import CollectionStats
+from .media_blob import MediaBlob
 from .school_class import SchoolClass
 from .student_collection import StudentCollection
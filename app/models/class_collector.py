@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey
+from sqlalchemy import Column, String, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -7,6 +7,7 @@ from .base import Base
 
 class ClassCollector(Base):
     __tablename__ = "class_collectors"
+    __table_args__ = (Index("ix_class_collectors_class_id_end", "class_id", "end"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     parent_id = Column(String(255), nullable=False)
@@ -16,4 +17,4 @@ class ClassCollector(Base):
     start = Column(DateTime, nullable=False)
     end = Column(DateTime, nullable=True)
 
-    class_ = relationship("Class", back_populates="class_collectors")
+    class_ = relationship("SchoolClass", back_populates="class_collectors")
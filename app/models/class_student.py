@@ -1,5 +1,12 @@
 import uuid
-from sqlalchemy import Column, ForeignKey, String, DateTime, Enum as SQLAlchemyEnum
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    String,
+    DateTime,
+    Enum as SQLAlchemyEnum,
+)
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -8,6 +15,17 @@ from .enums import ClassStudentStatus
 
 class ClassStudent(Base):
     __tablename__ = "class_students"
+    __table_args__ = (
+        # Przypisania dziecka (/me/children/classes): student_id + status, sort po start
+        Index(
+            "ix_class_students_student_id_status_start",
+            "student_id",
+            "status",
+            "start",
+        ),
+        # Lista uczniów klasy, sort po (start, id)
+        Index("ix_class_students_class_id_start", "class_id", "start", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     student_id = Column(String(255), nullable=False)
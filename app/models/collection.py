@@ -4,10 +4,14 @@ from datetime import datetime
 from sqlalchemy import (
     Column,
     Enum,
+    ForeignKey,
+    Index,
+    JSON,
     String,
     DateTime,
     Numeric,
     Text,
+    func,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -24,17 +28,31 @@ class CollectionStatus(enum.Enum):
 
 class Collection(Base):
     __tablename__ = "collections"
+    __table_args__ = (
+        Index(
+            "ix_collections_class_id_creation_date", "class_id", "creation_date", "id"
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     class_id = Column(String(255), nullable=False)
     start = Column(DateTime, nullable=False)
     end = Column(DateTime, nullable=False)
-    creation_date = Column(DateTime, default=datetime.now)
+    # NOT NULL - część kursora stronicowania (creation_date, id)
+    creation_date = Column(
+        DateTime, nullable=False, default=datetime.now, server_default=func.now()
+    )
     created_by = Column(String(255), nullable=False)
     account_id = Column(String(255), nullable=False)
     title = Column(String(255), nullable=False)
     description = Column(Text)
     logo = Column(String(255), nullable=True)
+    # Blob, na który wskazuje logo (None dla obrazka spoza media_blobs)
+    logo_key = Column(
+        String(255), ForeignKey("media_blobs.key"), nullable=True, index=True
+    )
+    # Rozmiar miniatury (px) -> URL, liczone po uploadzie logo
+    logo_variants = Column(JSON, nullable=True)
     purpose = Column(Text)
     total_amount = Column(Numeric(12, 2), nullable=False)
     status = Column(
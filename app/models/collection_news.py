@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -7,6 +7,9 @@ from .base import Base
 
 class CollectionNews(Base):
     __tablename__ = "collection_news"
+    __table_args__ = (
+        Index("ix_collection_news_collection_id_date", "collection_id", "date", "id"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     collection_id = Column(
@@ -1,6 +1,6 @@
 import uuid
 import enum
-from sqlalchemy import Column, String, Numeric, ForeignKey, Enum
+from sqlalchemy import Column, String, Numeric, ForeignKey, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -13,6 +13,7 @@ class PaymentType(enum.Enum):
 
 class CollectionPart(Base):
     __tablename__ = "collection_parts"
+    __table_args__ = (Index("ix_collection_parts_collection_id", "collection_id"),)
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False)
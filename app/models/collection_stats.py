@@ -0,0 +1,24 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Numeric
+from sqlalchemy.dialects.postgresql import UUID
+from .base import Base
+
+
+class CollectionStats(Base):
+    """
+    Zdenormalizowane liczniki zbiórki utrzymywane przez warstwę CRUD przy
+    każdym zapisie (crud.collection_stats), żeby odczyt postępu nie
+    przeliczał student_collections / collection_parts.
+    """
+
+    __tablename__ = "collection_stats"
+
+    collection_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("collections.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    participants_count = Column(Integer, nullable=False, default=0)
+    assigned_amount = Column(Numeric(12, 2), nullable=False, default=0)
+    parts_total = Column(Numeric(12, 2), nullable=False, default=0)
+    news_count = Column(Integer, nullable=False, default=0)
+    last_news_date = Column(DateTime, nullable=True)
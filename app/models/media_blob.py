@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from .base import Base
+
+
+class MediaBlob(Base):
+    """
+    Plik w MinIO adresowany treścią (klucz blobs/<sha256><rozszerzenie>).
+    ref_count to liczba wierszy wskazujących na klucz (SchoolClass.avatar_key,
+    Collection.logo_key) - utrzymywana przez warstwę CRUD (crud.media_blob).
+    URL-e budowane są z klucza przy zapisie, nie są tu przechowywane. Bloby
+    z ref_count = 0 usuwa `python -m app.scripts.gc_media_blobs`.
+    """
+
+    __tablename__ = "media_blobs"
+
+    key = Column(String(255), primary_key=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(BigInteger, nullable=False)
+    content_type = Column(String(100), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.now)
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Date
+from sqlalchemy import Column, ForeignKey, String, Date, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -10,6 +10,12 @@ class SchoolClass(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     avatar = Column(String(255), nullable=True)
+    # Blob, na który wskazuje awatar (None dla obrazka spoza media_blobs)
+    avatar_key = Column(
+        String(255), ForeignKey("media_blobs.key"), nullable=True, index=True
+    )
+    # Rozmiar miniatury (px) -> URL, liczone po uploadzie awatara
+    avatar_variants = Column(JSON, nullable=True)
     start_year = Column(Date, nullable=False)
     number = Column(String(10), nullable=False)
     chat_id = Column(String(255), nullable=True)
@@ -17,3 +23,6 @@ class SchoolClass(Base):
     class_students = relationship(
         "ClassStudent", back_populates="school_class", cascade="all, delete-orphan"
     )
+    class_collectors = relationship(
+        "ClassCollector", back_populates="class_", cascade="all, delete-orphan"
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Numeric, ForeignKey
+from sqlalchemy import Column, String, Numeric, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from .base import Base
@@ -6,6 +6,9 @@ from .base import Base
 
 class StudentCollection(Base):
     __tablename__ = "student_collections"
+    # Filtr po student_id obsługuje już klucz główny (student_id, collection_id),
+    # lista uczestników zbiórki filtruje po collection_id - stąd osobny indeks
+    __table_args__ = (Index("ix_student_collections_collection_id", "collection_id"),)
 
     student_id = Column(String(255), primary_key=True)
     collection_id = Column(
@@ -1,12 +1,23 @@
 import uuid
 from typing import List, Any, Optional
 
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    HTTPException,
+    status,
+    Query,
+    Response,
+    UploadFile,
+)
 
 from app import crud, schemas
-from app.dependencies.db import DatabaseDep
+from app.core.database import unit_of_work
+from app.dependencies.db import DatabaseDep, ReadDatabaseDep
 from app.dependencies.auth import CurrentUserDep
+from app.dependencies.pagination import CursorQuery, set_next_cursor
 from app.schemas.class_student import ClassStudentRequestCreate, ClassStudentStatus
+from app.services import media
 
 router = APIRouter()
 
@@ -30,22 +41,27 @@ async def create_school_class(
 
 @router.get("/", response_model=List[schemas.SchoolClass])
 async def read_school_classes(
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     current_user: CurrentUserDep,  # Might filter based on user or just require auth
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: CursorQuery = None,
 ) -> Any:
     """
     Retrieve school classes.
     """
-    classes = await crud.school_class.get_multi(db, skip=skip, limit=limit)
+    classes = await crud.school_class.get_multi(
+        db, skip=skip, limit=limit, cursor=cursor
+    )
+    set_next_cursor(response, crud.school_class.keyset, classes, limit)
     return classes
 
 
 @router.get("/{class_id}", response_model=schemas.SchoolClass)
 async def read_school_class(
     *,
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     class_id: uuid.UUID,
     current_user: CurrentUserDep,  # Check if user is related to the class?
 ) -> Any:
@@ -98,6 +114,83 @@ async def delete_school_class(
     return None  # Return None for 204
 
 
+@router.post("/{class_id}/avatar/upload", response_model=schemas.MediaUpload)
+async def create_school_class_avatar_upload(
+    *,
+    db: DatabaseDep,
+    class_id: uuid.UUID,
+    upload_in: schemas.MediaUploadRequest,
+    current_user: CurrentUserDep,  # Check permissions
+) -> Any:
+    """
+    Issue a short-lived presigned POST form for uploading the class avatar
+    directly to storage. Finish with POST /{class_id}/avatar/complete.
+    """
+    school_class = await crud.school_class.get(db=db, id=class_id)
+    if not school_class:
+        raise HTTPException(status_code=404, detail="School Class not found")
+    try:
+        return await media.create_upload("classes", class_id, upload_in.content_type)
+    except media.MediaUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{class_id}/avatar/complete", response_model=schemas.SchoolClass)
+async def complete_school_class_avatar_upload(
+    *,
+    db: DatabaseDep,
+    class_id: uuid.UUID,
+    complete_in: schemas.MediaUploadComplete,
+    current_user: CurrentUserDep,  # Check permissions
+    background_tasks: BackgroundTasks,
+) -> Any:
+    """
+    Validate the uploaded avatar and set it on the class. Thumbnails
+    (avatar_variants) are generated in the background afterwards.
+    """
+    school_class = await crud.school_class.get(db=db, id=class_id)
+    if not school_class:
+        raise HTTPException(status_code=404, detail="School Class not found")
+    try:
+        blob_key, avatar = await media.complete_upload(
+            db, "classes", class_id, complete_in.object_name
+        )
+    except media.MediaUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    background_tasks.add_task(media.build_class_avatar_variants, class_id, blob_key)
+    return await crud.school_class.set_avatar(
+        db=db, db_obj=school_class, avatar=avatar, avatar_key=blob_key
+    )
+
+
+@router.put("/{class_id}/avatar", response_model=schemas.SchoolClass)
+async def upload_school_class_avatar(
+    *,
+    db: DatabaseDep,
+    class_id: uuid.UUID,
+    file: UploadFile,
+    current_user: CurrentUserDep,  # Check permissions
+    background_tasks: BackgroundTasks,
+) -> Any:
+    """
+    Upload the class avatar through the API (multipart/form-data, field
+    "file") and set it on the class. The file is streamed to storage
+    without being held in memory. Thumbnails are generated in the
+    background, as after POST /{class_id}/avatar/complete.
+    """
+    school_class = await crud.school_class.get(db=db, id=class_id)
+    if not school_class:
+        raise HTTPException(status_code=404, detail="School Class not found")
+    try:
+        blob_key, avatar = await media.store_upload(db, file)
+    except media.MediaUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    background_tasks.add_task(media.build_class_avatar_variants, class_id, blob_key)
+    return await crud.school_class.set_avatar(
+        db=db, db_obj=school_class, avatar=avatar, avatar_key=blob_key
+    )
+
+
 # --- Endpoints for related models (ClassStudent, ClassCollector) ---
 
 
@@ -135,14 +228,16 @@ async def delete_school_class(
 )
 async def list_students_in_class(
     *,
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     class_id: uuid.UUID,
     current_user: CurrentUserDep,  # Sprawdź uprawnienia
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[schemas.ClassStudentStatus] = Query(
         None, description="Filter by student status (e.g., pending, active)"
     ),  # Filtr statusu
+    cursor: CursorQuery = None,
 ) -> Any:
     """
     List students assigned to a specific class.
@@ -165,7 +260,9 @@ async def list_students_in_class(
         skip=skip,
         limit=limit,
         status=status,  # Przekaż filtr statusu
+        cursor=cursor,
     )
+    set_next_cursor(response, crud.class_student.keyset, students, limit)
     return students
 
 
@@ -183,23 +280,29 @@ async def update_class_student_assignment(
     """
     Update details of a student's assignment to a class (e.g., set end date).
     """
-    # Sprawdź, czy klasa istnieje
-    school_class = await crud.school_class.get(db=db, id=class_id)
-    if not school_class:
+    # Pobierz konkretne przypisanie studenta (razem ze sprawdzeniem klasy)
+    class_exists, class_student = await crud.class_student.get_for_class(
+        db=db, class_id=class_id, class_student_id=class_student_id
+    )
+    if not class_exists:
         raise HTTPException(status_code=404, detail="School Class not found")
-
-    # Pobierz konkretne przypisanie studenta
-    class_student = await crud.class_student.get(db=db, id=class_student_id)
-    if not class_student or class_student.class_id != class_id:
+    if not class_student:
         raise HTTPException(
             status_code=404, detail="Class-Student assignment not found for this class"
         )
 
     # TODO: Sprawdź uprawnienia (np. czy current_user jest adminem lub skarbnikiem tej klasy)
 
-    updated_assignment = await crud.class_student.update(
-        db=db, db_obj=class_student, obj_in=student_in
-    )
+    # Zakończenie przypisania i wypisanie ucznia z nierozpoczętych zbiórek
+    # klasy - jedna transakcja
+    async with unit_of_work(db):
+        updated_assignment = await crud.class_student.update(
+            db=db, db_obj=class_student, obj_in=student_in
+        )
+        if updated_assignment.status == ClassStudentStatus.ENDED:
+            await crud.student_collection.remove_for_ended_student(
+                db=db, student_id=updated_assignment.student_id, class_id=class_id
+            )
     return updated_assignment
 
 
@@ -217,14 +320,13 @@ async def remove_student_from_class(
     Remove a student's assignment record from a class (Hard delete).
     Consider using PUT to set an end date instead for historical tracking.
     """
-    # Sprawdź, czy klasa istnieje
-    school_class = await crud.school_class.get(db=db, id=class_id)
-    if not school_class:
+    # Pobierz przypisanie (razem ze sprawdzeniem klasy)
+    class_exists, class_student = await crud.class_student.get_for_class(
+        db=db, class_id=class_id, class_student_id=class_student_id
+    )
+    if not class_exists:
         raise HTTPException(status_code=404, detail="School Class not found")
-
-    # Pobierz przypisanie
-    class_student = await crud.class_student.get(db=db, id=class_student_id)
-    if not class_student or class_student.class_id != class_id:
+    if not class_student:
         raise HTTPException(
             status_code=404, detail="Class-Student assignment not found for this class"
         )
@@ -269,12 +371,14 @@ async def add_collector_to_class(
 @router.get("/{class_id}/collectors/", response_model=List[schemas.ClassCollector])
 async def list_collectors_for_class(
     *,
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     class_id: uuid.UUID,
     current_user: CurrentUserDep,  # Sprawdź uprawnienia (np. członek klasy/admin)
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     active_only: bool = False,  # Opcjonalny parametr do filtrowania aktywnych
+    cursor: CursorQuery = None,
 ) -> Any:
     """
     List collectors assigned to a specific class.
@@ -286,8 +390,14 @@ async def list_collectors_for_class(
     # TODO: Sprawdź uprawnienia
 
     collectors = await crud.class_collector.get_multi_by_class(
-        db=db, class_id=class_id, skip=skip, limit=limit, only_active=active_only
+        db=db,
+        class_id=class_id,
+        skip=skip,
+        limit=limit,
+        only_active=active_only,
+        cursor=cursor,
     )
+    set_next_cursor(response, crud.class_collector.keyset, collectors, limit)
     return collectors
 
 
@@ -305,12 +415,12 @@ async def update_class_collector_assignment(
     """
     Update details of a collector's assignment (e.g., set end date).
     """
-    school_class = await crud.school_class.get(db=db, id=class_id)
-    if not school_class:
+    class_exists, class_collector = await crud.class_collector.get_for_class(
+        db=db, class_id=class_id, class_collector_id=class_collector_id
+    )
+    if not class_exists:
         raise HTTPException(status_code=404, detail="School Class not found")
-
-    class_collector = await crud.class_collector.get(db=db, id=class_collector_id)
-    if not class_collector or class_collector.class_id != class_id:
+    if not class_collector:
         raise HTTPException(
             status_code=404,
             detail="Class-Collector assignment not found for this class",
@@ -338,12 +448,12 @@ async def remove_collector_from_class(
     """
     Remove a collector's assignment record from a class (Hard delete).
     """
-    school_class = await crud.school_class.get(db=db, id=class_id)
-    if not school_class:
+    class_exists, class_collector = await crud.class_collector.get_for_class(
+        db=db, class_id=class_id, class_collector_id=class_collector_id
+    )
+    if not class_exists:
         raise HTTPException(status_code=404, detail="School Class not found")
-
-    class_collector = await crud.class_collector.get(db=db, id=class_collector_id)
-    if not class_collector or class_collector.class_id != class_id:
+    if not class_collector:
         raise HTTPException(
             status_code=404,
             detail="Class-Collector assignment not found for this class",
@@ -409,6 +519,68 @@ async def request_add_student_to_class(
     return class_student_request
 
 
+@router.patch(
+    "/{class_id}/students/status",
+    response_model=schemas.ClassStudentBulkStatusResult,
+    summary="Collector: Approve or reject many pending student join requests",
+)
+async def bulk_update_class_students_status(
+    *,
+    db: DatabaseDep,
+    class_id: uuid.UUID,
+    status_update: schemas.ClassStudentBulkStatusUpdate,
+    current_user: CurrentUserDep,  # To powinien być skarbnik
+) -> Any:
+    """
+    Approve or reject pending join requests of a class in one statement.
+    Omit `class_student_ids` to transition every pending request of the class.
+    Requests that are not pending (or do not belong to the class) are
+    reported in `failed` instead of failing the whole call.
+    """
+    collector_id = current_user.get("sub")
+    if not collector_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+        )
+
+    if status_update.status not in (
+        ClassStudentStatus.ACTIVE,
+        ClassStudentStatus.REJECTED,
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Pending requests can only be changed to 'active' or 'rejected'.",
+        )
+
+    class_student_ids = status_update.class_student_ids
+    if class_student_ids is not None:
+        class_student_ids = list(dict.fromkeys(class_student_ids))
+
+    class_exists, updated, failed = await crud.class_student.bulk_update_pending_status(
+        db=db,
+        class_id=class_id,
+        new_status=status_update.status,
+        class_student_ids=class_student_ids,
+    )
+    if not class_exists:
+        raise HTTPException(status_code=404, detail="School Class not found")
+    return {
+        "updated": updated,
+        "failed": [
+            schemas.ClassStudentBulkStatusFailure(
+                class_student_id=class_student_id,
+                status=current_status,
+                detail=(
+                    "Class-Student assignment not found for this class"
+                    if current_status is None
+                    else f"Cannot change status of a request with status {current_status.value}"
+                ),
+            )
+            for class_student_id, current_status in failed.items()
+        ],
+    }
+
+
 @router.patch(
     "/{class_id}/students/{class_student_id}/status",
     response_model=schemas.ClassStudent,
@@ -433,11 +605,6 @@ async def update_class_student_status(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
 
-    # Sprawdź, czy klasa istnieje
-    school_class = await crud.school_class.get(db=db, id=class_id)
-    if not school_class:
-        raise HTTPException(status_code=404, detail="School Class not found")
-
     # --- WAŻNE: Sprawdzenie uprawnień Skarbnika ---
     # TODO: Sprawdź, czy collector_id jest AKTYWNYM skarbnikiem DLA TEJ KLASY (class_id)
     # is_collector = await crud.class_collector.is_active_collector_for_class(db, user_id=collector_id, class_id=class_id)
@@ -445,9 +612,13 @@ async def update_class_student_status(
     #     raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are not an active collector for this class.")
     # --- Koniec Sprawdzania Uprawnień ---
 
-    # Pobierz przypisanie studenta
-    class_student = await crud.class_student.get(db=db, id=class_student_id)
-    if not class_student or class_student.class_id != class_id:
+    # Pobierz przypisanie studenta (razem ze sprawdzeniem klasy)
+    class_exists, class_student = await crud.class_student.get_for_class(
+        db=db, class_id=class_id, class_student_id=class_student_id
+    )
+    if not class_exists:
+        raise HTTPException(status_code=404, detail="School Class not found")
+    if not class_student:
         raise HTTPException(
             status_code=404, detail="Class-Student assignment not found for this class"
         )
@@ -468,9 +639,14 @@ async def update_class_student_status(
         )
 
     try:
-        updated_assignment = await crud.class_student.update_status(
-            db=db, db_obj=class_student, new_status=status_update.status
-        )
+        async with unit_of_work(db):
+            updated_assignment = await crud.class_student.update_status(
+                db=db, db_obj=class_student, new_status=status_update.status
+            )
+            if updated_assignment.status == ClassStudentStatus.ENDED:
+                await crud.student_collection.remove_for_ended_student(
+                    db=db, student_id=updated_assignment.student_id, class_id=class_id
+                )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
@@ -1,15 +1,38 @@
 import uuid
 from typing import List, Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    status,
+    Body,
+    Query,
+    Response,
+    UploadFile,
+)
 
 from app import crud, schemas, models
-from app.dependencies.db import DatabaseDep
+from app.dependencies.db import DatabaseDep, ReadDatabaseDep
 from app.dependencies.auth import CurrentUserDep
+from app.dependencies.expand import ExpandQuery, parse_expand
+from app.dependencies.pagination import CursorQuery, set_next_cursor
+from app.services import media
 
 router = APIRouter()
 
 
+def _with_expanded(collection: models.Collection, expand: List[str]) -> dict:
+    """Zbiórka jako dict z relacjami z expand (załadowanymi przez selectinload)."""
+    data = schemas.Collection.model_validate(
+        collection, from_attributes=True
+    ).model_dump()
+    for name in expand:
+        data[name] = getattr(collection, crud.collection.expandable[name].key)
+    return data
+
+
 @router.post(
     "/", response_model=schemas.Collection, status_code=status.HTTP_201_CREATED
 )
@@ -34,59 +57,102 @@ async def create_collection(
     # Optional: Check if current_user is allowed to create collection for this class_id
     # (e.g., are they a ClassCollector for this class?)
 
+    # Tworzy też części zbiórki i wpisy StudentCollection dla aktywnych uczniów
+    # klasy (jeden INSERT ... SELECT, jedna transakcja)
     collection = await crud.collection.create(
         db=db, obj_in=collection_in, created_by_id=user_id
     )
 
-    # TODO: Potentially auto-create StudentCollection entries here based on ClassStudents
-    # students_in_class = await crud.class_student.get_multi_by_class(db=db, class_id=collection.class_id)
-    # for student in students_in_class:
-    #     if student.end is None or student.end > datetime.now(): # Only active students
-    #        # Calculate student amount based on collection.payment_type, total_amount, etc.
-    #        student_amount = ...
-    #        student_collection_in = schemas.StudentCollectionCreate(student_id=student.student_id, total_amount=student_amount)
-    #        await crud.student_collection.create_for_collection(db=db, obj_in=student_collection_in, collection_id=collection.id)
-
     return collection
 
 
-@router.get("/", response_model=List[schemas.Collection])
+@router.get("/", response_model=List[schemas.CollectionExpanded])
 async def read_collections(
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     current_user: CurrentUserDep,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     class_id: Optional[str] = None,  # Filter by class_id (which is string in model)
+    cursor: CursorQuery = None,
+    expand: ExpandQuery = None,
 ) -> Any:
     """
     Retrieve collections. Can be filtered by class_id.
+    Use `expand=parts,news,students` to include related items
+    (one extra query per relationship for the whole page).
     """
+    expand = parse_expand(expand, crud.collection.expandable)
     if class_id:
         # Need to ensure class_id format matches what's stored if it's supposed to be UUID
         collections = await crud.collection.get_multi_by_class(
-            db, class_id=class_id, skip=skip, limit=limit
+            db,
+            class_id=class_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            expand=expand,
         )
     else:
         # Add logic here if users should only see collections relevant to them
-        collections = await crud.collection.get_multi(db, skip=skip, limit=limit)
-    return collections
+        collections = await crud.collection.get_multi(
+            db, skip=skip, limit=limit, cursor=cursor, expand=expand
+        )
+    set_next_cursor(response, crud.collection.keyset, collections, limit)
+    return [_with_expanded(collection, expand) for collection in collections]
+
+
+@router.get("/summary", response_model=List[schemas.CollectionSummary])
+async def read_collections_summary(
+    *,
+    db: ReadDatabaseDep,
+    current_user: CurrentUserDep,
+    collection_ids: List[uuid.UUID] = Query(..., alias="ids", max_length=100),
+) -> Any:
+    """
+    Get progress summaries of many collections in one call
+    (`?ids=...&ids=...`). Unknown ids are skipped.
+    """
+    collection_ids = list(dict.fromkeys(collection_ids))
+    summaries = await crud.collection.get_summaries(db=db, ids=collection_ids)
+    return [summaries[id] for id in collection_ids if id in summaries]
 
 
-@router.get("/{collection_id}", response_model=schemas.Collection)
+@router.get("/{collection_id}", response_model=schemas.CollectionExpanded)
 async def read_collection(
     *,
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     collection_id: uuid.UUID,
     current_user: CurrentUserDep,
+    expand: ExpandQuery = None,
 ) -> Any:
     """
     Get collection by ID.
+    Use `expand=parts,news,students` to include related items in one call.
     """
-    collection = await crud.collection.get(db=db, id=collection_id)
+    expand = parse_expand(expand, crud.collection.expandable)
+    collection = await crud.collection.get(db=db, id=collection_id, expand=expand)
     if not collection:
         raise HTTPException(status_code=404, detail="Collection not found")
     # Add permission check: Is user part of the class associated with collection?
-    return collection
+    return _with_expanded(collection, expand)
+
+
+@router.get("/{collection_id}/summary", response_model=schemas.CollectionSummary)
+async def read_collection_summary(
+    *,
+    db: ReadDatabaseDep,
+    collection_id: uuid.UUID,
+    current_user: CurrentUserDep,
+) -> Any:
+    """
+    Get how far a collection is toward its total amount: participants count,
+    amount assigned to participants, per-part totals and remaining amount.
+    """
+    summaries = await crud.collection.get_summaries(db=db, ids=[collection_id])
+    if collection_id not in summaries:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    return summaries[collection_id]
 
 
 @router.put("/{collection_id}", response_model=schemas.Collection)
@@ -138,6 +204,89 @@ async def delete_collection(
     return None
 
 
+@router.post("/{collection_id}/logo/upload", response_model=schemas.MediaUpload)
+async def create_collection_logo_upload(
+    *,
+    db: DatabaseDep,
+    collection_id: uuid.UUID,
+    upload_in: schemas.MediaUploadRequest,
+    current_user: CurrentUserDep,
+) -> Any:
+    """
+    Issue a short-lived presigned POST form for uploading the collection logo
+    directly to storage. Finish with POST /{collection_id}/logo/complete.
+    """
+    collection = await crud.collection.get(db=db, id=collection_id)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    try:
+        return await media.create_upload(
+            "collections", collection_id, upload_in.content_type
+        )
+    except media.MediaUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/{collection_id}/logo/complete", response_model=schemas.Collection)
+async def complete_collection_logo_upload(
+    *,
+    db: DatabaseDep,
+    collection_id: uuid.UUID,
+    complete_in: schemas.MediaUploadComplete,
+    current_user: CurrentUserDep,
+    background_tasks: BackgroundTasks,
+) -> Any:
+    """
+    Validate the uploaded logo and set it on the collection. Thumbnails
+    (logo_variants) are generated in the background afterwards.
+    """
+    collection = await crud.collection.get(db=db, id=collection_id)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    try:
+        blob_key, logo = await media.complete_upload(
+            db, "collections", collection_id, complete_in.object_name
+        )
+    except media.MediaUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    background_tasks.add_task(
+        media.build_collection_logo_variants, collection_id, blob_key
+    )
+    return await crud.collection.set_logo(
+        db=db, db_obj=collection, logo=logo, logo_key=blob_key
+    )
+
+
+@router.put("/{collection_id}/logo", response_model=schemas.Collection)
+async def upload_collection_logo(
+    *,
+    db: DatabaseDep,
+    collection_id: uuid.UUID,
+    file: UploadFile,
+    current_user: CurrentUserDep,
+    background_tasks: BackgroundTasks,
+) -> Any:
+    """
+    Upload the collection logo through the API (multipart/form-data, field
+    "file") and set it on the collection. The file is streamed to storage
+    without being held in memory. Thumbnails are generated in the
+    background, as after POST /{collection_id}/logo/complete.
+    """
+    collection = await crud.collection.get(db=db, id=collection_id)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    try:
+        blob_key, logo = await media.store_upload(db, file)
+    except media.MediaUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    background_tasks.add_task(
+        media.build_collection_logo_variants, collection_id, blob_key
+    )
+    return await crud.collection.set_logo(
+        db=db, db_obj=collection, logo=logo, logo_key=blob_key
+    )
+
+
 # --- Endpoints for related models (Parts, News, StudentCollections) ---
 
 
@@ -170,11 +319,13 @@ async def create_collection_part(
 @router.get("/{collection_id}/parts/", response_model=List[schemas.CollectionPart])
 async def list_collection_parts(
     *,
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     collection_id: uuid.UUID,
     current_user: CurrentUserDep,  # Check permissions
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: CursorQuery = None,
 ) -> Any:
     """
     List parts for a specific collection.
@@ -184,8 +335,9 @@ async def list_collection_parts(
         raise HTTPException(status_code=404, detail="Collection not found")
     # Add permission checks
     parts = await crud.collection_part.get_multi_by_collection(
-        db=db, collection_id=collection_id, skip=skip, limit=limit
+        db=db, collection_id=collection_id, skip=skip, limit=limit, cursor=cursor
     )
+    set_next_cursor(response, crud.collection_part.keyset, parts, limit)
     return parts
 
 
@@ -226,11 +378,13 @@ async def create_collection_news(
 @router.get("/{collection_id}/news/", response_model=List[schemas.CollectionNews])
 async def list_collection_news(
     *,
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     collection_id: uuid.UUID,
     current_user: CurrentUserDep,  # Check permissions
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: CursorQuery = None,
 ) -> Any:
     """
     List news items for a specific collection.
@@ -240,8 +394,9 @@ async def list_collection_news(
         raise HTTPException(status_code=404, detail="Collection not found")
     # Add permission checks
     news_list = await crud.collection_news.get_multi_by_collection(
-        db=db, collection_id=collection_id, skip=skip, limit=limit
+        db=db, collection_id=collection_id, skip=skip, limit=limit, cursor=cursor
     )
+    set_next_cursor(response, crud.collection_news.keyset, news_list, limit)
     return news_list
 
 
@@ -254,11 +409,13 @@ async def list_collection_news(
 )
 async def list_students_in_collection(
     *,
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     collection_id: uuid.UUID,
     current_user: CurrentUserDep,  # Check permissions (creator, collector?)
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: CursorQuery = None,
 ) -> Any:
     """
     List students participating in a specific collection and their amounts.
@@ -268,7 +425,13 @@ async def list_students_in_collection(
         raise HTTPException(status_code=404, detail="Collection not found")
     # Add permission checks
     student_participations = await crud.student_collection.get_multi_by_collection(
-        db=db, collection_id=collection_id, skip=skip, limit=limit
+        db=db, collection_id=collection_id, skip=skip, limit=limit, cursor=cursor
+    )
+    set_next_cursor(
+        response,
+        crud.student_collection.keyset_by_collection,
+        student_participations,
+        limit,
     )
     return student_participations
 
@@ -285,12 +448,12 @@ async def update_collection_part(
     """
     Update a collection part.
     """
-    collection = await crud.collection.get(db=db, id=collection_id)
-    if not collection:
+    collection_exists, part = await crud.collection_part.get_for_collection(
+        db=db, collection_id=collection_id, part_id=part_id
+    )
+    if not collection_exists:
         raise HTTPException(status_code=404, detail="Collection not found")
-
-    part = await crud.collection_part.get(db=db, id=part_id)
-    if not part or part.collection_id != collection_id:
+    if not part:
         raise HTTPException(
             status_code=404, detail="Collection Part not found for this collection"
         )
@@ -314,12 +477,12 @@ async def delete_collection_part(
     """
     Delete a collection part.
     """
-    collection = await crud.collection.get(db=db, id=collection_id)
-    if not collection:
+    collection_exists, part = await crud.collection_part.get_for_collection(
+        db=db, collection_id=collection_id, part_id=part_id
+    )
+    if not collection_exists:
         raise HTTPException(status_code=404, detail="Collection not found")
-
-    part = await crud.collection_part.get(db=db, id=part_id)
-    if not part or part.collection_id != collection_id:
+    if not part:
         raise HTTPException(
             status_code=404, detail="Collection Part not found for this collection"
         )
@@ -348,12 +511,12 @@ async def update_collection_news_item(
     """
     Update a news item associated with a collection.
     """
-    collection = await crud.collection.get(db=db, id=collection_id)
-    if not collection:
+    collection_exists, news_item = await crud.collection_news.get_for_collection(
+        db=db, collection_id=collection_id, news_id=news_id
+    )
+    if not collection_exists:
         raise HTTPException(status_code=404, detail="Collection not found")
-
-    news_item = await crud.collection_news.get(db=db, id=news_id)
-    if not news_item or news_item.collection_id != collection_id:
+    if not news_item:
         raise HTTPException(
             status_code=404, detail="News item not found for this collection"
         )
@@ -382,12 +545,12 @@ async def delete_collection_news_item(
     """
     Delete a news item associated with a collection.
     """
-    collection = await crud.collection.get(db=db, id=collection_id)
-    if not collection:
+    collection_exists, news_item = await crud.collection_news.get_for_collection(
+        db=db, collection_id=collection_id, news_id=news_id
+    )
+    if not collection_exists:
         raise HTTPException(status_code=404, detail="Collection not found")
-
-    news_item = await crud.collection_news.get(db=db, id=news_id)
-    if not news_item or news_item.collection_id != collection_id:
+    if not news_item:
         raise HTTPException(
             status_code=404, detail="News item not found for this collection"
         )
@@ -445,12 +608,36 @@ async def add_student_participation(
     return participation
 
 
+@router.put(
+    "/{collection_id}/students/", response_model=List[schemas.StudentCollection]
+)
+async def bulk_upsert_student_participations(
+    *,
+    db: DatabaseDep,
+    collection_id: uuid.UUID,
+    participations_in: List[schemas.StudentCollectionCreate],
+    current_user: CurrentUserDep,  # Sprawdź uprawnienia (np. collector/admin)
+) -> Any:
+    """
+    Create or update participation records (amounts) for many students at once.
+    Executed as a single INSERT ... ON CONFLICT DO UPDATE statement.
+    """
+    collection = await crud.collection.get(db=db, id=collection_id)
+    if not collection:
+        raise HTTPException(status_code=404, detail="Collection not found")
+
+    participations = await crud.student_collection.bulk_upsert(
+        db=db, objs_in=participations_in, collection_id=collection_id
+    )
+    return participations
+
+
 @router.get(
     "/{collection_id}/students/{student_id}", response_model=schemas.StudentCollection
 )
 async def get_student_participation(
     *,
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     collection_id: uuid.UUID,
     student_id: str,  # ID studenta (z Keycloak)
     current_user: CurrentUserDep,  # Sprawdź uprawnienia
@@ -458,15 +645,13 @@ async def get_student_participation(
     """
     Get a specific student's participation details for a collection.
     """
-    collection = await crud.collection.get(db=db, id=collection_id)
-    if not collection:
-        raise HTTPException(status_code=404, detail="Collection not found")
-
     # TODO: Sprawdź uprawnienia (np. skarbnik/admin LUB sam student/rodzic?)
 
-    participation = await crud.student_collection.get(
-        db=db, student_id=student_id, collection_id=collection_id
+    collection_exists, participation = await crud.student_collection.get_for_collection(
+        db=db, collection_id=collection_id, student_id=student_id
     )
+    if not collection_exists:
+        raise HTTPException(status_code=404, detail="Collection not found")
     if not participation:
         raise HTTPException(
             status_code=404, detail="Student participation record not found"
@@ -489,15 +674,13 @@ async def update_student_participation(
     """
     Update a student's participation details (e.g., the amount).
     """
-    collection = await crud.collection.get(db=db, id=collection_id)
-    if not collection:
-        raise HTTPException(status_code=404, detail="Collection not found")
-
     # TODO: Sprawdź uprawnienia
 
-    participation = await crud.student_collection.get(
-        db=db, student_id=student_id, collection_id=collection_id
+    collection_exists, participation = await crud.student_collection.get_for_collection(
+        db=db, collection_id=collection_id, student_id=student_id
     )
+    if not collection_exists:
+        raise HTTPException(status_code=404, detail="Collection not found")
     if not participation:
         raise HTTPException(
             status_code=404, detail="Student participation record not found"
@@ -522,15 +705,13 @@ async def delete_student_participation(
     """
     Delete a student's participation record from a collection.
     """
-    collection = await crud.collection.get(db=db, id=collection_id)
-    if not collection:
-        raise HTTPException(status_code=404, detail="Collection not found")
-
     # TODO: Sprawdź uprawnienia
 
-    participation = await crud.student_collection.get(
-        db=db, student_id=student_id, collection_id=collection_id
+    collection_exists, participation = await crud.student_collection.get_for_collection(
+        db=db, collection_id=collection_id, student_id=student_id
     )
+    if not collection_exists:
+        raise HTTPException(status_code=404, detail="Collection not found")
     if not participation:
         raise HTTPException(
             status_code=404, detail="Student participation record not found"
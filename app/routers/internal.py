@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, status
+
+from app.dependencies.auth import verify_internal_token
+from app.services import user_service_api
+
+router = APIRouter(dependencies=[Depends(verify_internal_token)])
+
+
+@router.post(
+    "/cache/children/{parent_id}/invalidate",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="UserService: children of a parent changed",
+)
+async def invalidate_children_cache(parent_id: str) -> None:
+    """
+    Drop the cached list of children of the given parent, so the next
+    request fetches it from UserService again.
+    """
+    await user_service_api.invalidate_children(parent_id)
+    return None
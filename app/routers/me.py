@@ -1,15 +1,12 @@
-import asyncio
 import uuid
 from typing import Any, Dict, List
 
 from fastapi import APIRouter, HTTPException, Request
-from sqlalchemy import select
-from starlette import status  # Potrzebne do gather
+from starlette import status
 
-from app import crud, models, schemas
+from app import crud, schemas
 from app.dependencies.auth import CurrentUserDep
-from app.dependencies.db import DatabaseDep
-from app.models.enums import ClassStudentStatus
+from app.dependencies.db import ReadDatabaseDep
 from app.services import user_service_api  # Importuj klienta
 
 router = APIRouter()
@@ -26,7 +23,7 @@ class ClassInfoForParent(schemas.SchoolClass):  # Dziedziczymy z SchoolClass
 )
 async def get_my_children_classes(
     *,
-    db: DatabaseDep,
+    db: ReadDatabaseDep,
     current_user: CurrentUserDep,
     request: Request  # Inject Request object to get headers
 ) -> Any:
@@ -50,52 +47,30 @@ async def get_my_children_classes(
     if not child_ids:
         return []  # Rodzic nie ma dzieci lub wystąpił błąd w UserService
 
-    # 2. Dla każdego dziecka, znajdź jego AKTYWNE przypisania do klas w CollectionService
-    tasks = []
-    for student_id in child_ids:
-        # Uruchamiamy zapytania równolegle
-        tasks.append(
-            crud.class_student.get_multi_by_student(
-                db=db,
-                student_id=student_id,
-                status=ClassStudentStatus.ACTIVE,  # Tylko aktywne!
-            )
-        )
-
-    results = await asyncio.gather(*tasks)
-
-    # 3. Zbierz unikalne ID klas i połącz z ID studenta
-    class_student_map: Dict[uuid.UUID, str] = {}  # Mapa class_id -> student_id
-    active_class_ids = set()
-    for student_assignments in results:
-        for assignment in student_assignments:
-            if (
-                assignment.class_id not in class_student_map
-            ):  # Weź pierwsze znalezione dziecko dla danej klasy
-                class_student_map[assignment.class_id] = assignment.student_id
-            active_class_ids.add(assignment.class_id)
-
-    if not active_class_ids:
-        return []
-
-    # 4. Pobierz szczegóły tych klas
-    # TODO: Potrzebujemy CRUD dla SchoolClass do pobierania wielu klas po ID
-    # school_classes = await crud.school_class.get_multi_by_ids(db, ids=list(active_class_ids))
-    # Zakładając, że taka funkcja istnieje:
-    school_classes_db = await db.execute(
-        select(models.SchoolClass).filter(models.SchoolClass.id.in_(active_class_ids))
+    # 2. AKTYWNE przypisania wszystkich dzieci razem z klasami - jedno zapytanie
+    child_ids = [str(child_id) for child_id in child_ids]
+    rows = await crud.class_student.get_active_classes_for_students(
+        db=db, student_ids=child_ids
     )
-    school_classes = school_classes_db.scalars().all()
 
-    # 5. Przygotuj odpowiedź, dodając student_id do danych klasy
-    response_data = []
-    for school_class in school_classes:
-        class_info = ClassInfoForParent.from_orm(
-            school_class
-        )  # Użyj Pydantic do konwersji
-        class_info.student_id = class_student_map.get(
-            school_class.id, "unknown"
-        )  # Powinno zawsze znaleźć
-        response_data.append(class_info)
-
-    return response_data
+    # 3. Jedna pozycja na klasę - z pierwszym (wg kolejności z UserService)
+    # dzieckiem, które do niej uczęszcza
+    child_order = {student_id: index for index, student_id in enumerate(child_ids)}
+    classes: Dict[uuid.UUID, Any] = {}
+    class_student_map: Dict[uuid.UUID, str] = {}  # Mapa class_id -> student_id
+    for school_class, student_id in rows:
+        current = class_student_map.get(school_class.id)
+        if current is None or child_order[student_id] < child_order[current]:
+            class_student_map[school_class.id] = student_id
+        classes[school_class.id] = school_class
+
+    # 4. Przygotuj odpowiedź, dodając student_id do danych klasy
+    return [
+        {
+            **schemas.SchoolClass.model_validate(
+                school_class, from_attributes=True
+            ).model_dump(),
+            "student_id": class_student_map[class_id],
+        }
+        for class_id, school_class in classes.items()
+    ]
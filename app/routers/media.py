@@ -0,0 +1,130 @@
+import re
+from email.utils import format_datetime
+from typing import Annotated, Optional, Tuple
+
+from fastapi import APIRouter, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from minio.datatypes import Object
+from minio.error import S3Error
+
+from app.core.config import MEDIA_CACHE_MAX_AGE
+from app.services.blob_store import BLOB_PREFIX
+from app.services.minio_api import minio_open_object, minio_stat_object
+
+router = APIRouter()
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etag(stat: Object) -> str:
+    return f'"{stat.etag}"'
+
+
+def _matches(header: str, etag: str) -> bool:
+    """If-None-Match / If-Range: lista ETagów albo "*" (słabe porównanie W/)."""
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Pojedynczy zakres bytes=start-end -> (start, end) włącznie; None, gdy
+    nagłówek jest w innej postaci albo niepoprawny, np. bytes=5-3 (wtedy
+    odpowiedź obejmuje cały plik). Niespełnialny zakres (start poza plikiem,
+    bytes=-0) -> 416.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # bytes=-N: ostatnie N bajtów
+        suffix = int(end)
+        start, end = max(size - suffix, 0) if suffix else size, size - 1
+    else:
+        if end and int(end) < int(start):
+            return None
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+async def _stat_media(object_name: str) -> Object:
+    # Serwowane są tylko bloby adresowane treścią (bez uploads/ i reszty bucketu)
+    if not object_name.startswith(BLOB_PREFIX) or ".." in object_name:
+        raise HTTPException(status_code=404, detail="Media not found")
+    stat = await minio_stat_object(object_name)
+    if stat is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return stat
+
+
+def _cache_headers(stat: Object) -> dict:
+    headers = {
+        "ETag": _etag(stat),
+        # Treść pod kluczem bloba nigdy się nie zmienia
+        "Cache-Control": f"public, max-age={MEDIA_CACHE_MAX_AGE}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+    if stat.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(stat.last_modified, usegmt=True)
+    return headers
+
+
+@router.api_route(
+    "/{object_name:path}",
+    methods=["GET", "HEAD"],
+    summary="Serve an uploaded media file",
+)
+async def read_media(
+    request: Request,
+    object_name: str,
+    if_none_match: Annotated[Optional[str], Header()] = None,
+    range_header: Annotated[Optional[str], Header(alias="Range")] = None,
+    if_range: Annotated[Optional[str], Header()] = None,
+) -> Response:
+    """
+    Stream a media file (avatar, logo, thumbnail) from storage.
+
+    Answers If-None-Match with 304 from object metadata alone, without
+    reading the body, and supports single byte ranges (Range / If-Range).
+    No authentication: media keys are content hashes, and this lets clients
+    use the URLs directly in image tags.
+    """
+    stat = await _stat_media(object_name)
+    headers = _cache_headers(stat)
+    etag = headers["ETag"]
+    if if_none_match is not None and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    if range_header is not None and (if_range is None or _matches(if_range, etag)):
+        byte_range = _parse_range(range_header, stat.size)
+
+    if byte_range is not None:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+    else:
+        start, end = 0, stat.size - 1
+        status_code = status.HTTP_200_OK
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+
+    if request.method == "HEAD":
+        return Response(
+            status_code=status_code, headers=headers, media_type=stat.content_type
+        )
+
+    try:
+        body = await minio_open_object(object_name, offset=start, length=length)
+    except S3Error as e:
+        # Usunięty między stat a odczytem (np. przez GC)
+        raise HTTPException(status_code=404, detail="Media not found") from e
+    return StreamingResponse(
+        body, status_code=status_code, headers=headers, media_type=stat.content_type
+    )
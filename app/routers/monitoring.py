@@ -0,0 +1,43 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.core.database import get_pool_stats
+from app.core.security import claims_cache, jwks_provider
+from app.dependencies.auth import verify_internal_token
+from app.services import user_service_api
+
+# Stan puli, cache i bezpiecznika to dane wewnętrzne - ten sam sekret co /internal
+router = APIRouter(dependencies=[Depends(verify_internal_token)])
+
+
+@router.get("/db-pool", summary="Database connection pool statistics")
+async def read_db_pool_stats() -> Any:
+    """
+    Current state of the process-wide database connection pool
+    (checked-out connections, overflow, time spent waiting for a connection).
+    """
+    return get_pool_stats()
+
+
+@router.get("/caches", summary="In-process cache statistics")
+async def read_cache_stats() -> Any:
+    """Size and hit rate of the in-process caches of this worker."""
+    return {
+        "user_children": user_service_api.children_cache.stats(),
+        "jwt_claims": claims_cache.stats(),
+    }
+
+
+@router.get("/user-service", summary="UserService client state")
+async def read_user_service_stats() -> Any:
+    """Circuit breaker state of the UserService client in this worker."""
+    return user_service_api.user_service_breaker.stats()
+
+
+@router.get("/jwks", summary="Loaded token signing keys")
+async def read_jwks_stats() -> Any:
+    """Key ids currently loaded from Keycloak's JWKS endpoint."""
+    if jwks_provider is None:
+        return {"enabled": False}
+    return {"enabled": True, **jwks_provider.stats()}
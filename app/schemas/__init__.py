@@ -5,3 +5,5 @@ from .collection_news import *
 from .collection_part import *
 from .school_class import *
 from .student_collection import *
+from .collection_summary import *
+from .media import *
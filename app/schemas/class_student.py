@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from app.models.enums import ClassStudentStatus
 
@@ -57,3 +57,23 @@ class ClassStudentInDB(ClassStudentInDBBase):
 # Nowy endpoint do akceptacji/odrzucenia
 class ClassStudentStatusUpdate(BaseModel):
     status: ClassStudentStatus  # Oczekuje tylko nowego statusu
+
+
+# Akceptacja/odrzucenie wielu zgłoszeń naraz
+class ClassStudentBulkStatusUpdate(BaseModel):
+    status: ClassStudentStatus  # active lub rejected
+    # None = wszystkie oczekujące zgłoszenia w klasie
+    class_student_ids: Optional[List[uuid.UUID]] = None
+
+
+class ClassStudentBulkStatusFailure(BaseModel):
+    class_student_id: uuid.UUID
+    status: Optional[ClassStudentStatus] = (
+        None  # Aktualny status, None gdy brak w klasie
+    )
+    detail: str
+
+
+class ClassStudentBulkStatusResult(BaseModel):
+    updated: List[ClassStudent] = []
+    failed: List[ClassStudentBulkStatusFailure] = []
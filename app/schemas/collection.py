@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, HttpUrl, Field
 
 # Import related schemas AFTER they are defined or use forward references
@@ -9,6 +9,9 @@ from pydantic import BaseModel, HttpUrl, Field
 # from .collection_news import CollectionNews
 # from .student_collection import StudentCollection
 from app.models.collection import CollectionStatus  # Import Enum
+from .collection_news import CollectionNews
+from .collection_part import CollectionPart, CollectionPartCreate
+from .student_collection import StudentCollection
 
 
 # Shared properties
@@ -29,7 +32,9 @@ class CollectionBase(BaseModel):
 class CollectionCreate(CollectionBase):
     # created_by will be set from the token
     # creation_date is set by default
-    pass
+    # Parts are created together with the collection and used to compute
+    # the amounts of the auto-generated StudentCollection entries
+    parts: List[CollectionPartCreate] = []
 
 
 # Properties to receive on item update
@@ -51,6 +56,8 @@ class CollectionInDBBase(CollectionBase):
     id: uuid.UUID
     creation_date: datetime
     created_by: str  # User ID from token
+    # Thumbnail size in px ("64", "256", "1024") -> WebP URL, None until generated
+    logo_variants: Optional[Dict[str, str]] = None
 
     class Config:
         orm_mode = True
@@ -65,6 +72,14 @@ class Collection(CollectionInDBBase):
     pass
 
 
+# Collection with relationships requested via ?expand=parts,news,students
+# (None = relationship not requested)
+class CollectionExpanded(Collection):
+    parts: Optional[List[CollectionPart]] = None
+    news: Optional[List[CollectionNews]] = None
+    students: Optional[List[StudentCollection]] = None
+
+
 # Properties stored in DB
 class CollectionInDB(CollectionInDBBase):
     pass
@@ -0,0 +1,27 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+from pydantic import BaseModel
+from app.models.collection_part import PaymentType  # Import Enum
+
+
+class CollectionPartSummary(BaseModel):
+    id: uuid.UUID
+    name: str
+    payment_type: PaymentType
+    amount: Decimal  # Kwota zdefiniowana w części
+    total: Decimal  # personFixed: kwota * liczba uczestników, totalFixed: kwota
+
+
+# Postęp zbiórki względem jej total_amount
+class CollectionSummary(BaseModel):
+    collection_id: uuid.UUID
+    total_amount: Decimal
+    participants_count: int
+    assigned_amount: Decimal  # Suma StudentCollection.total_amount
+    remaining_amount: Decimal  # total_amount - assigned_amount
+    parts_total: Decimal  # Suma kwot zdefiniowanych w częściach
+    news_count: int
+    last_news_date: Optional[datetime] = None
+    parts: List[CollectionPartSummary] = []
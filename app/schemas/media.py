@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Dict
+
+from pydantic import BaseModel
+
+
+# Request for a presigned upload URL
+class MediaUploadRequest(BaseModel):
+    content_type: str
+
+
+# Presigned upload returned to the client
+class MediaUpload(BaseModel):
+    upload_url: str
+    object_name: str
+    method: str = "POST"
+    # Form fields to send (multipart/form-data) before the "file" field;
+    # the signed policy fixes the key, Content-Type and maximum size
+    fields: Dict[str, str] = {}
+    expires_at: datetime
+
+
+# Sent by the client once the POST to MinIO has finished
+class MediaUploadComplete(BaseModel):
+    object_name: str
@@ -1,6 +1,6 @@
 import uuid
 from datetime import date
-from typing import Optional
+from typing import Dict, Optional
 from pydantic import BaseModel, HttpUrl
 
 
@@ -28,6 +28,8 @@ class SchoolClassUpdate(SchoolClassBase):
 # Properties shared by models stored in DB
 class SchoolClassInDBBase(SchoolClassBase):
     id: uuid.UUID
+    # Thumbnail size in px ("64", "256", "1024") -> WebP URL, None until generated
+    avatar_variants: Optional[Dict[str, str]] = None
 
     class Config:
         orm_mode = True  # Replaced from_attributes=True for Pydantic v1 compatibility if needed
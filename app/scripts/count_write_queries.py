@@ -0,0 +1,254 @@
+"""
+Liczy zapytania SQL (razem z COMMIT-ami) na ścieżkach zapisu CRUD.
+
+    python -m app.scripts.count_write_queries
+
+Na bazie z DATABASE_URL tworzy klasę, zbiórkę i ich zasoby zagnieżdżone,
+mierząc każde wywołanie CRUD, a na koniec usuwa wszystko, co utworzył.
+Uruchamiać na bazie deweloperskiej albo testowej, nie produkcyjnej.
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Awaitable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app import crud, schemas
+from app.core.database import dispose_engine, get_session_factory, init_engine
+from app.models.collection import CollectionStatus
+from app.models.collection_part import PaymentType
+from app.models.enums import ClassStudentStatus
+
+
+class QueryCounter:
+    """Zlicza instrukcje (before_cursor_execute) i COMMIT-y silnika."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.count = 0
+        self.results: List[Tuple[str, int]] = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_query)
+        event.listen(engine.sync_engine, "commit", self._on_query)
+
+    def _on_query(self, *args: Any) -> None:
+        self.count += 1
+
+    async def measure(self, label: str, call: Awaitable) -> Any:
+        self.count = 0
+        result = await call
+        self.results.append((label, self.count))
+        return result
+
+
+async def run_write_paths(db: AsyncSession, counter: QueryCounter) -> None:
+    measure = counter.measure
+    now = datetime.now()
+
+    school_class = await measure(
+        "school_class.create",
+        crud.school_class.create(
+            db,
+            obj_in=schemas.SchoolClassCreate(
+                start_year=date(now.year, 9, 1), number="bench"
+            ),
+        ),
+    )
+    await measure(
+        "school_class.update",
+        crud.school_class.update(
+            db, db_obj=school_class, obj_in=schemas.SchoolClassUpdate(number="bench-2")
+        ),
+    )
+    collector = await measure(
+        "class_collector.create_for_class",
+        crud.class_collector.create_for_class(
+            db,
+            obj_in=schemas.ClassCollectorCreate(parent_id="bench-parent"),
+            class_id=school_class.id,
+        ),
+    )
+    await measure(
+        "class_collector.update",
+        crud.class_collector.update(
+            db, db_obj=collector, obj_in=schemas.ClassCollectorUpdate(end=now)
+        ),
+    )
+    students = []
+    for student_id in ("bench-student-1", "bench-student-2"):
+        student = await measure(
+            "class_student.create_request",
+            crud.class_student.create_request(
+                db,
+                obj_in=schemas.ClassStudentRequestCreate(student_id=student_id),
+                class_id=school_class.id,
+                requested_by_parent_id="bench-parent",
+            ),
+        )
+        student = await measure(
+            "class_student.update_status",
+            crud.class_student.update_status(
+                db, db_obj=student, new_status=ClassStudentStatus.ACTIVE
+            ),
+        )
+        students.append(student)
+    await measure(
+        "class_student.update",
+        crud.class_student.update(
+            db,
+            db_obj=students[0],
+            obj_in=schemas.ClassStudentUpdate(end=now + timedelta(days=365)),
+        ),
+    )
+
+    collection = await measure(
+        "collection.create (2 parts, 2 students)",
+        crud.collection.create(
+            db,
+            obj_in=schemas.CollectionCreate(
+                class_id=str(school_class.id),
+                start=now,
+                end=now + timedelta(days=30),
+                account_id="bench-account",
+                title="bench",
+                total_amount=Decimal("100"),
+                status=CollectionStatus.NEW,
+                parts=[
+                    schemas.CollectionPartCreate(
+                        name="total",
+                        total_amount=Decimal("80"),
+                        payment_type=PaymentType.TOTAL_FIXED,
+                    ),
+                    schemas.CollectionPartCreate(
+                        name="person",
+                        total_amount=Decimal("10"),
+                        payment_type=PaymentType.PERSON_FIXED,
+                    ),
+                ],
+            ),
+            created_by_id="bench-parent",
+        ),
+    )
+    await measure(
+        "collection.update",
+        crud.collection.update(
+            db, db_obj=collection, obj_in=schemas.CollectionUpdate(title="bench-2")
+        ),
+    )
+    part = await measure(
+        "collection_part.create",
+        crud.collection_part.create(
+            db,
+            obj_in=schemas.CollectionPartCreate(
+                name="extra",
+                total_amount=Decimal("5"),
+                payment_type=PaymentType.TOTAL_FIXED,
+            ),
+            collection_id=collection.id,
+        ),
+    )
+    await measure(
+        "collection_part.update (amount)",
+        crud.collection_part.update(
+            db,
+            db_obj=part,
+            obj_in=schemas.CollectionPartUpdate(total_amount=Decimal("6")),
+        ),
+    )
+    await measure("collection_part.remove", crud.collection_part.remove(db, id=part.id))
+    news = await measure(
+        "collection_news.create",
+        crud.collection_news.create(
+            db,
+            obj_in=schemas.CollectionNewsCreate(content="bench"),
+            collection_id=collection.id,
+            author_id="bench-parent",
+        ),
+    )
+    await measure(
+        "collection_news.update",
+        crud.collection_news.update(
+            db, db_obj=news, obj_in=schemas.CollectionNewsUpdate(content="bench-2")
+        ),
+    )
+    await measure("collection_news.remove", crud.collection_news.remove(db, id=news.id))
+
+    participation = await measure(
+        "student_collection.create",
+        crud.student_collection.create(
+            db,
+            obj_in=schemas.StudentCollectionCreate(
+                student_id="bench-student-3", total_amount=Decimal("1")
+            ),
+            collection_id=collection.id,
+        ),
+    )
+    await measure(
+        "student_collection.update",
+        crud.student_collection.update(
+            db,
+            db_obj=participation,
+            obj_in=schemas.StudentCollectionUpdate(total_amount=Decimal("2")),
+        ),
+    )
+    await measure(
+        "student_collection.bulk_upsert (1 new, 2 existing)",
+        crud.student_collection.bulk_upsert(
+            db,
+            objs_in=[
+                schemas.StudentCollectionCreate(
+                    student_id=student_id, total_amount=Decimal("3")
+                )
+                for student_id in (
+                    "bench-student-2",
+                    "bench-student-3",
+                    "bench-student-4",
+                )
+            ],
+            collection_id=collection.id,
+        ),
+    )
+    await measure(
+        "student_collection.remove",
+        crud.student_collection.remove(
+            db, student_id="bench-student-3", collection_id=collection.id
+        ),
+    )
+
+    await measure(
+        "class_collector.remove", crud.class_collector.remove(db, id=collector.id)
+    )
+    await measure(
+        "class_student.remove", crud.class_student.remove(db, id=students[1].id)
+    )
+    await measure("collection.remove", crud.collection.remove(db, id=collection.id))
+    await measure(
+        "school_class.remove", crud.school_class.remove(db, id=school_class.id)
+    )
+
+
+async def count_write_queries() -> List[Tuple[str, int]]:
+    counter = QueryCounter(init_engine())
+    try:
+        async with get_session_factory()() as db:
+            await run_write_paths(db, counter)
+        return counter.results
+    finally:
+        await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    results = asyncio.run(count_write_queries())
+    width = max(len(label) for label, _ in results)
+    for label, count in results:
+        print(f"{label:<{width}}  {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Usuwa z MinIO bloby mediów bez referencji i porzucone uploady.
+
+    python -m app.scripts.gc_media_blobs [--dry-run]
+
+Usuwane są bloby z ref_count = 0 nieużywane od MEDIA_BLOB_GC_GRACE_HOURS
+(razem z miniaturami) oraz obiekty w uploads/ starsze niż ten sam okres
+(presigned upload bez complete).
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app import crud
+from app.core.config import MEDIA_BLOB_GC_GRACE_HOURS, MEDIA_THUMBNAIL_SIZES
+from app.core.database import dispose_engine, get_session_factory, init_engine
+from app.services.images import thumbnail_key
+from app.services.media import UPLOAD_PREFIX
+from app.services.minio_api import (
+    minio_list_objects,
+    minio_remove_object,
+    shutdown_minio_pool,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def _remove_blob(key: str) -> None:
+    for size in MEDIA_THUMBNAIL_SIZES:
+        await minio_remove_object(thumbnail_key(key, size))
+    await minio_remove_object(key)
+
+
+async def collect_blobs(dry_run: bool = False) -> int:
+    cutoff = datetime.now() - timedelta(hours=MEDIA_BLOB_GC_GRACE_HOURS)
+    removed = 0
+    async with get_session_factory()() as db:
+        while True:
+            orphans = await crud.media_blob.get_orphans(db, older_than=cutoff)
+            if dry_run:
+                for blob in orphans:
+                    logger.info("Orphaned blob %s (%d bytes)", blob.key, blob.size)
+                return len(orphans)
+            if not orphans:
+                return removed
+            # DELETE blokuje wiersze do commita - obiekty usuwamy przed nim.
+            # Upload tego samego pliku (adopt_object) czeka wtedy na commit
+            # i kopiuje obiekt od nowa, zamiast wskazać na usunięty
+            keys = await crud.media_blob.remove_orphans(
+                db, keys=[blob.key for blob in orphans], older_than=cutoff
+            )
+            try:
+                for key in keys:
+                    await _remove_blob(key)
+            except Exception:
+                # Wiersze zostają; brakujący obiekt odtworzy kolejny upload
+                await db.rollback()
+                raise
+            await db.commit()
+            removed += len(keys)
+            logger.info("Removed %d orphaned blob(s)", len(keys))
+            if len(keys) < len(orphans):
+                return removed
+
+
+async def collect_uploads(dry_run: bool = False) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=MEDIA_BLOB_GC_GRACE_HOURS)
+    stale = [
+        item
+        for item in await minio_list_objects(UPLOAD_PREFIX)
+        if item.last_modified is not None and item.last_modified < cutoff
+    ]
+    for item in stale:
+        logger.info("Abandoned upload %s (%d bytes)", item.object_name, item.size)
+        if not dry_run:
+            await minio_remove_object(item.object_name)
+    return len(stale)
+
+
+async def collect(dry_run: bool = False) -> None:
+    init_engine()
+    try:
+        blobs = await collect_blobs(dry_run=dry_run)
+        uploads = await collect_uploads(dry_run=dry_run)
+        logger.info(
+            "media GC: %d blob(s), %d abandoned upload(s)%s",
+            blobs,
+            uploads,
+            " (dry run, nothing removed)" if dry_run else "",
+        )
+    finally:
+        await dispose_engine()
+        shutdown_minio_pool()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only report, do not remove anything"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    asyncio.run(collect(dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
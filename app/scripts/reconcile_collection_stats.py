@@ -0,0 +1,60 @@
+"""
+Przelicza collection_stats od zera i raportuje rozjazdy.
+
+    python -m app.scripts.reconcile_collection_stats [--dry-run]
+
+Kod wyjścia 1, gdy znaleziono rozjazdy (także po ich naprawieniu), żeby
+dało się to podpiąć pod cron/monitoring.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from app import crud
+from app.core.database import dispose_engine, get_session_factory, init_engine
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile(dry_run: bool = False) -> int:
+    init_engine()
+    try:
+        async with get_session_factory()() as db:
+            drift = await crud.collection_stats.find_drift(db)
+            for item in drift:
+                logger.warning(
+                    "collection_stats drift for %s: stored=%s expected=%s",
+                    item["collection_id"],
+                    item["stored"],
+                    item["expected"],
+                )
+            if drift and not dry_run:
+                await crud.collection_stats.refresh(
+                    db, collection_ids=[item["collection_id"] for item in drift]
+                )
+                await db.commit()
+            logger.info(
+                "collection_stats: %d collection(s) drifted%s",
+                len(drift),
+                " (dry run, nothing changed)" if dry_run else "",
+            )
+            return len(drift)
+    finally:
+        await dispose_engine()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--dry-run", action="store_true", help="only report drift, do not fix it"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    drifted = asyncio.run(reconcile(dry_run=args.dry_run))
+    sys.exit(1 if drifted else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import hashlib
+import mimetypes
+from typing import BinaryIO, Tuple
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.core.config import MINIO_BUCKET
+from app.services.minio_api import (
+    media_url,
+    minio_client,
+    minio_copy_object,
+    minio_remove_object,
+    minio_stat_object,
+    minio_upload_file,
+    run_in_minio_pool,
+)
+
+BLOB_PREFIX = "blobs/"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def blob_key(sha256: str, content_type: str) -> str:
+    """Klucz adresowany treścią: blobs/<sha256><rozszerzenie>."""
+    return f"{BLOB_PREFIX}{sha256}{mimetypes.guess_extension(content_type) or ''}"
+
+
+def _hash_stream(stream: BinaryIO) -> Tuple[str, int]:
+    digest = hashlib.sha256()
+    size = 0
+    while chunk := stream.read(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _hash_object(object_name: str) -> Tuple[str, int]:
+    response = minio_client.get_object(MINIO_BUCKET, object_name)
+    try:
+        return _hash_stream(response)
+    finally:
+        response.close()
+        response.release_conn()
+
+
+async def adopt_object(
+    db: AsyncSession, object_name: str, content_type: str
+) -> Tuple[str, str]:
+    """
+    Przenosi wgrany obiekt pod klucz z jego SHA-256: liczy skrót strumieniowo,
+    kopiuje po stronie MinIO tylko wtedy, gdy takiego bloba jeszcze nie ma,
+    i usuwa obiekt tymczasowy. Zwraca (klucz, URL) bloba.
+
+    Wiersz bloba jest rejestrowany (i blokowany do końca transakcji) przed
+    sprawdzeniem obiektu: GC usuwa obiekty przed commitem swojego DELETE,
+    więc albo czekamy na niego i nie zastaniemy obiektu (kopia), albo GC
+    zobaczy świeże updated_at i bloba nie ruszy.
+    """
+    sha256, size = await run_in_minio_pool(_hash_object, object_name)
+    key = blob_key(sha256, content_type)
+    await crud.media_blob.register(
+        db, key=key, sha256=sha256, size=size, content_type=content_type
+    )
+    if await minio_stat_object(key) is None:
+        await minio_copy_object(object_name, key)
+    await minio_remove_object(object_name)
+    return key, media_url(key)
+
+
+async def store_file(
+    db: AsyncSession, file: UploadFile, content_type: str
+) -> Tuple[str, str]:
+    """
+    Zapisuje UploadFile jako blob: skrót liczony strumieniowo z pliku
+    tymczasowego, a upload do MinIO pomijany, gdy blob już istnieje
+    (rejestracja przed sprawdzeniem - jak w adopt_object).
+    Zwraca (klucz, URL) bloba.
+    """
+    await file.seek(0)
+    sha256, size = await run_in_minio_pool(_hash_stream, file.file)
+    key = blob_key(sha256, content_type)
+    await crud.media_blob.register(
+        db, key=key, sha256=sha256, size=size, content_type=content_type
+    )
+    if await minio_stat_object(key) is None:
+        await minio_upload_file(key, file, content_type)
+    return key, media_url(key)
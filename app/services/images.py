@@ -0,0 +1,117 @@
+import asyncio
+import io
+import logging
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from app.core.config import (
+    MEDIA_IMAGE_WORKERS,
+    MEDIA_THUMBNAIL_QUALITY,
+    MEDIA_THUMBNAIL_SIZES,
+)
+from app.services.minio_api import (
+    minio_get_object_bytes,
+    media_url,
+    minio_put_bytes,
+    minio_stat_object,
+)
+
+logger = logging.getLogger(__name__)
+
+# Skalowanie obrazków obciąża CPU - robią to osobne procesy, nie event loop.
+# Pula tworzona przy pierwszym użyciu, zamykana w lifespan
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MEDIA_IMAGE_WORKERS)
+    return _executor
+
+
+def shutdown_image_pool() -> None:
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+def thumbnail_key(object_name: str, size: int) -> str:
+    """Klucz miniatury: blobs/<sha256>.png -> blobs/<sha256>/256.webp"""
+    base, _ = posixpath.splitext(object_name)
+    return f"{base}/{size}.webp"
+
+
+def make_thumbnails(data: bytes, sizes: List[int], quality: int) -> Dict[int, bytes]:
+    """
+    Miniatury WebP mieszczące się w kwadracie size x size (z zachowaniem
+    proporcji, bez powiększania). Wykonywane w procesie z puli, więc
+    argumenty i wynik muszą być picklowalne. Pillow jest zależnością
+    opcjonalną - importowany dopiero tutaj.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+        thumbnails = {}
+        for size in sorted(sizes):
+            thumbnail = image.copy()
+            thumbnail.thumbnail((size, size), Image.Resampling.LANCZOS)
+            output = io.BytesIO()
+            thumbnail.save(output, "WEBP", quality=quality, method=4)
+            thumbnails[size] = output.getvalue()
+        return thumbnails
+
+
+async def generate_thumbnails(object_name: str) -> Optional[Dict[str, str]]:
+    """
+    Pobiera obrazek z MinIO, liczy miniatury w puli procesów i zapisuje je
+    pod kluczami z thumbnail_key. Zwraca {rozmiar: URL} albo None, gdy nie
+    da się ich wygenerować (błąd jest logowany). Bloby są adresowane treścią,
+    więc miniatury już istniejące dla tego samego obrazka nie są liczone
+    ponownie.
+    """
+    try:
+        existing = await asyncio.gather(
+            *(
+                minio_stat_object(thumbnail_key(object_name, size))
+                for size in MEDIA_THUMBNAIL_SIZES
+            )
+        )
+        if all(stat is not None for stat in existing):
+            return {
+                str(size): media_url(thumbnail_key(object_name, size))
+                for size in sorted(MEDIA_THUMBNAIL_SIZES)
+            }
+
+        data = await minio_get_object_bytes(object_name)
+        loop = asyncio.get_running_loop()
+        thumbnails = await loop.run_in_executor(
+            _get_executor(),
+            make_thumbnails,
+            data,
+            MEDIA_THUMBNAIL_SIZES,
+            MEDIA_THUMBNAIL_QUALITY,
+        )
+        await asyncio.gather(
+            *(
+                minio_put_bytes(thumbnail_key(object_name, size), body, "image/webp")
+                for size, body in thumbnails.items()
+            )
+        )
+    except ImportError:
+        logger.warning("Pillow is not installed, skipping thumbnails")
+        return None
+    except Exception:
+        logger.exception("Could not generate thumbnails for %s", object_name)
+        return None
+    return {
+        str(size): media_url(thumbnail_key(object_name, size)) for size in thumbnails
+    }
@@ -1,26 +1,23 @@
+import asyncio
 import logging
+from typing import Dict, Iterable, Optional
 
-from keycloak.keycloak_admin import KeycloakAdmin
+from keycloak import KeycloakAdmin
+from keycloak.exceptions import KeycloakGetError
 
+from app.core.cache import TTLCache
 from app.core.config import (
+    KEYCLOAK_ADMIN_CONCURRENCY,
+    KEYCLOAK_ADMIN_TIMEOUT,
     KEYCLOAK_HOST,
     KEYCLOAK_CLIENT_ID,
     KEYCLOAK_CLIENT_SECRET_KEY,
     KEYCLOAK_REALM,
+    KEYCLOAK_USER_CACHE_TTL,
 )
 
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
 
-logger = logging.getLogger("keycloak")
-logger.setLevel(logging.DEBUG)
-
-keycloak_admin = KeycloakAdmin(
-    server_url=KEYCLOAK_HOST,
-    client_id=KEYCLOAK_CLIENT_ID,
-    client_secret_key=KEYCLOAK_CLIENT_SECRET_KEY,
-    realm_name=KEYCLOAK_REALM,
-    verify=False,
-)
 # ustawiwnia admin-cli
 #   - Client authentication - on
 #   - Authorization Enabled - on
@@ -30,3 +27,67 @@ keycloak_admin = KeycloakAdmin(
 # dodanie ról:
 #   Clients -> admin-cli -> Service Account Roles -> view-users
 #   Clients -> admin-cli -> Service Account Roles -> manage-users
+
+
+class KeycloakAdminClient:
+    """
+    Asynchroniczny dostęp do Keycloak Admin API.
+
+    KeycloakAdmin jest tworzony dopiero przy pierwszym użyciu (import nie
+    dotyka sieci) i używa asynchronicznych metod biblioteki (a_*), więc nie
+    blokuje event loopa. Token admina trzyma i odświeża połączenie
+    KeycloakAdmin (przy ~90% czasu życia), a nie każde wywołanie.
+    """
+
+    def __init__(self) -> None:
+        self._admin: Optional[KeycloakAdmin] = None
+        self._semaphore = asyncio.Semaphore(KEYCLOAK_ADMIN_CONCURRENCY)
+        self.users_cache = TTLCache(10000, KEYCLOAK_USER_CACHE_TTL)
+
+    @property
+    def admin(self) -> KeycloakAdmin:
+        if self._admin is None:
+            self._admin = KeycloakAdmin(
+                server_url=KEYCLOAK_HOST,
+                client_id=KEYCLOAK_CLIENT_ID,
+                client_secret_key=KEYCLOAK_CLIENT_SECRET_KEY,
+                realm_name=KEYCLOAK_REALM,
+                verify=False,
+                timeout=KEYCLOAK_ADMIN_TIMEOUT,
+            )
+        return self._admin
+
+    async def get_user(self, user_id: str) -> Optional[dict]:
+        """Użytkownik Keycloaka po ID albo None, jeśli nie istnieje."""
+        user = self.users_cache.get(user_id)
+        if user is not None:
+            return user
+        async with self._semaphore:
+            try:
+                user = await self.admin.a_get_user(user_id)
+            except KeycloakGetError as e:
+                if e.response_code == 404:
+                    return None
+                raise
+        self.users_cache.set(user_id, user)
+        return user
+
+    async def get_users_by_ids(self, user_ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Wielu użytkowników naraz: bez duplikatów, najpierw z cache, brakujący
+        równolegle (najwyżej KEYCLOAK_ADMIN_CONCURRENCY zapytań naraz).
+        Nieistniejących użytkowników nie ma w wyniku.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        users = await asyncio.gather(*(self.get_user(user_id) for user_id in user_ids))
+        return {
+            user_id: user for user_id, user in zip(user_ids, users) if user is not None
+        }
+
+    async def close(self) -> None:
+        if self._admin is not None:
+            await self._admin.connection.aclose()
+            self._admin = None
+
+
+keycloak_admin = KeycloakAdminClient()
@@ -0,0 +1,133 @@
+import logging
+import mimetypes
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import crud
+from app.core.config import (
+    MEDIA_ALLOWED_CONTENT_TYPES,
+    MEDIA_MAX_UPLOAD_SIZE,
+    MEDIA_UPLOAD_URL_EXPIRES,
+)
+from app.core.database import get_session_factory
+from app.services.blob_store import adopt_object, store_file
+from app.services.images import generate_thumbnails
+from app.services.minio_api import (
+    minio_presigned_post,
+    minio_remove_object,
+    minio_stat_object,
+)
+
+logger = logging.getLogger(__name__)
+
+# Obiekty wgrane presigned POST-em, zanim trafią do blobs/ (porzucone usuwa GC)
+UPLOAD_PREFIX = "uploads/"
+
+
+class MediaUploadError(ValueError):
+    """Niepoprawny upload mediów (zły typ, rozmiar, klucz albo brak obiektu)."""
+
+
+def media_prefix(kind: str, owner_id: uuid.UUID) -> str:
+    """Prefiks tymczasowych uploadów właściciela, np. uploads/classes/<id>/."""
+    return f"{UPLOAD_PREFIX}{kind}/{owner_id}/"
+
+
+async def create_upload(kind: str, owner_id: uuid.UUID, content_type: str) -> dict:
+    """
+    Presigned POST dla nowego obiektu pod prefiksem właściciela. Klient wysyła
+    plik bezpośrednio do MinIO (polityka wymusza typ i maksymalny rozmiar),
+    a potem zgłasza koniec uploadu (complete_upload). Deduplikacja odbywa się
+    dopiero po uploadzie - sam zadeklarowany skrót nie daje dostępu do bloba.
+    """
+    if content_type not in MEDIA_ALLOWED_CONTENT_TYPES:
+        raise MediaUploadError(f"Unsupported content type: {content_type}")
+
+    extension = mimetypes.guess_extension(content_type) or ""
+    object_name = f"{media_prefix(kind, owner_id)}{uuid.uuid4()}{extension}"
+    expires = timedelta(seconds=MEDIA_UPLOAD_URL_EXPIRES)
+    upload_url, fields = minio_presigned_post(
+        object_name, content_type, MEDIA_MAX_UPLOAD_SIZE, expires
+    )
+    return {
+        "upload_url": upload_url,
+        "object_name": object_name,
+        "method": "POST",
+        "fields": fields,
+        "expires_at": datetime.now(timezone.utc) + expires,
+    }
+
+
+async def complete_upload(
+    db: AsyncSession, kind: str, owner_id: uuid.UUID, object_name: str
+) -> Tuple[str, str]:
+    """
+    Sprawdza wgrany obiekt (prefiks właściciela, istnienie, typ i rozmiar)
+    i przenosi go do blobów adresowanych treścią. Obiekt niespełniający
+    warunków jest usuwany. Zwraca (klucz, URL) bloba.
+    """
+    if not object_name.startswith(media_prefix(kind, owner_id)) or ".." in object_name:
+        raise MediaUploadError("Object does not belong to this resource")
+
+    stat = await minio_stat_object(object_name)
+    if stat is None:
+        raise MediaUploadError("Uploaded object not found")
+
+    if stat.content_type not in MEDIA_ALLOWED_CONTENT_TYPES:
+        await minio_remove_object(object_name)
+        raise MediaUploadError(f"Unsupported content type: {stat.content_type}")
+    if stat.size > MEDIA_MAX_UPLOAD_SIZE:
+        await minio_remove_object(object_name)
+        raise MediaUploadError(
+            f"Uploaded file is too large (max {MEDIA_MAX_UPLOAD_SIZE} bytes)"
+        )
+
+    return await adopt_object(db, object_name, stat.content_type)
+
+
+async def store_upload(db: AsyncSession, file: UploadFile) -> Tuple[str, str]:
+    """
+    Upload przez API (multipart/form-data): sprawdza typ i rozmiar, po czym
+    zapisuje plik strumieniowo jako blob. Zwraca (klucz, URL) bloba.
+    """
+    if file.content_type not in MEDIA_ALLOWED_CONTENT_TYPES:
+        raise MediaUploadError(f"Unsupported content type: {file.content_type}")
+    if not file.size:
+        raise MediaUploadError("Uploaded file is empty")
+    if file.size > MEDIA_MAX_UPLOAD_SIZE:
+        raise MediaUploadError(
+            f"Uploaded file is too large (max {MEDIA_MAX_UPLOAD_SIZE} bytes)"
+        )
+    return await store_file(db, file, file.content_type)
+
+
+async def build_class_avatar_variants(class_id: uuid.UUID, avatar_key: str) -> None:
+    """Zadanie w tle po uploadzie awatara: miniatury + zapis ich URL-i."""
+    variants = await generate_thumbnails(avatar_key)
+    if variants is None:
+        return
+    async with get_session_factory()() as db:
+        if not await crud.school_class.set_avatar_variants(
+            db, id=class_id, avatar_key=avatar_key, variants=variants
+        ):
+            logger.info("Avatar of class %s changed, thumbnails discarded", class_id)
+
+
+async def build_collection_logo_variants(
+    collection_id: uuid.UUID, logo_key: str
+) -> None:
+    """Zadanie w tle po uploadzie logo: miniatury + zapis ich URL-i."""
+    variants = await generate_thumbnails(logo_key)
+    if variants is None:
+        return
+    async with get_session_factory()() as db:
+        if not await crud.collection.set_logo_variants(
+            db, id=collection_id, logo_key=logo_key, variants=variants
+        ):
+            logger.info(
+                "Logo of collection %s changed, thumbnails discarded", collection_id
+            )
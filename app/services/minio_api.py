@@ -1,12 +1,30 @@
+import asyncio
+import functools
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from fastapi import UploadFile
 from minio import Minio
+from minio.commonconfig import CopySource
+from minio.datatypes import Object, PostPolicy
+from minio.error import S3Error
 
 from app.core.config import (
     MINIO_ACCESS_KEY,
     MINIO_BUCKET,
     MINIO_ENDPOINT,
+    MEDIA_PUBLIC_URL,
+    MEDIA_STREAM_CHUNK_SIZE,
+    MINIO_MAX_WORKERS,
+    MINIO_PART_SIZE,
+    MINIO_PUBLIC_ENDPOINT,
+    MINIO_REGION,
     MINIO_SECRET_KEY,
 )
 
+T = TypeVar("T")
 
 minio_client = Minio(
     MINIO_ENDPOINT,
@@ -15,18 +33,187 @@ minio_client = Minio(
     secure=False,
 )
 
+# Tylko do podpisywania URL-i pod publicznym adresem - z podanym regionem
+# podpis liczy się lokalnie, bez zapytania do MinIO
+minio_public_client = Minio(
+    MINIO_PUBLIC_ENDPOINT,
+    access_key=MINIO_ACCESS_KEY,
+    secret_key=MINIO_SECRET_KEY,
+    secure=False,
+    region=MINIO_REGION,
+)
+
+# SDK MinIO jest synchroniczne - wywołania idą do ograniczonej puli wątków,
+# żeby nie blokować event loopa i nie zająć całej domyślnej puli
+_executor = ThreadPoolExecutor(
+    max_workers=MINIO_MAX_WORKERS, thread_name_prefix="minio"
+)
+
 
 def get_minio_client():
     return minio_client
 
 
-def init_minio_bucket():
+async def run_in_minio_pool(func: Callable[..., T], *args, **kwargs) -> T:
+    """Uruchamia blokujące wywołanie SDK MinIO w puli wątków."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+def shutdown_minio_pool() -> None:
+    _executor.shutdown(wait=True)
+
+
+def minio_object_url(object_name: str) -> str:
+    return f"http://{MINIO_ENDPOINT}/{MINIO_BUCKET}/{object_name}"
+
+
+def media_url(object_name: str) -> str:
+    """Publiczny URL obiektu przez endpoint /media (bez wystawiania MinIO)."""
+    return f"{MEDIA_PUBLIC_URL}/{object_name}"
+
+
+def _init_minio_bucket():
     if not minio_client.bucket_exists(MINIO_BUCKET):
         minio_client.make_bucket(MINIO_BUCKET)
 
 
-def minio_put_object(object_name, file_content):
-    file_size = len(file_content)
-    minio_client.put_object(MINIO_BUCKET, object_name, file_content, file_size)
-    object_url = f"http://{MINIO_ENDPOINT}/{MINIO_BUCKET}/{object_name}"
-    return object_url
+async def init_minio_bucket():
+    await run_in_minio_pool(_init_minio_bucket)
+
+
+async def minio_upload_file(
+    object_name: str, file: UploadFile, content_type: Optional[str] = None
+) -> str:
+    """
+    Strumieniowy upload pliku do MinIO (multipart, części po MINIO_PART_SIZE).
+
+    SDK czyta plik kawałkami wprost z UploadFile.file (SpooledTemporaryFile,
+    większe pliki leżą na dysku), więc w pamięci jest naraz najwyżej jedna
+    część, a nie cały plik. Zwraca URL obiektu.
+    """
+    await file.seek(0)
+    await run_in_minio_pool(
+        minio_client.put_object,
+        MINIO_BUCKET,
+        object_name,
+        file.file,
+        length=-1,
+        part_size=MINIO_PART_SIZE,
+        # Części po kolei - równoległe trzymałyby w pamięci kilka części naraz
+        num_parallel_uploads=1,
+        content_type=content_type or file.content_type or "application/octet-stream",
+    )
+    return minio_object_url(object_name)
+
+
+def minio_presigned_post(
+    object_name: str, content_type: str, max_size: int, expires: timedelta
+) -> Tuple[str, Dict[str, str]]:
+    """
+    Krótkotrwały formularz POST, którym klient wysyła plik wprost do MinIO.
+    Polityka wiąże klucz i Content-Type oraz ogranicza rozmiar
+    (content-length-range) - MinIO odrzuca niezgodny upload sam.
+    Zwraca (URL, pola formularza); plik idzie jako ostatnie pole "file".
+    """
+    policy = PostPolicy(MINIO_BUCKET, datetime.now(timezone.utc) + expires)
+    policy.add_equals_condition("key", object_name)
+    policy.add_equals_condition("Content-Type", content_type)
+    policy.add_content_length_range_condition(1, max_size)
+    fields = minio_public_client.presigned_post_policy(policy)
+    fields.update({"key": object_name, "Content-Type": content_type})
+    return f"http://{MINIO_PUBLIC_ENDPOINT}/{MINIO_BUCKET}", fields
+
+
+async def minio_stat_object(object_name: str) -> Optional[Object]:
+    """Metadane obiektu albo None, jeśli nie istnieje."""
+    try:
+        return await run_in_minio_pool(
+            minio_client.stat_object, MINIO_BUCKET, object_name
+        )
+    except S3Error as e:
+        if e.code in ("NoSuchKey", "NoSuchObject"):
+            return None
+        raise
+
+
+async def minio_get_object_bytes(object_name: str) -> bytes:
+    """Cały obiekt w pamięci - tylko dla małych plików (np. obrazków)."""
+
+    def _read() -> bytes:
+        response = minio_client.get_object(MINIO_BUCKET, object_name)
+        try:
+            return response.read()
+        finally:
+            response.close()
+            response.release_conn()
+
+    return await run_in_minio_pool(_read)
+
+
+async def minio_open_object(
+    object_name: str, offset: int = 0, length: int = 0
+) -> AsyncIterator[bytes]:
+    """
+    Otwiera obiekt (albo zakres offset/length, 0 = do końca) i zwraca
+    iterator po kawałkach MEDIA_STREAM_CHUNK_SIZE - przekazywanych dalej bez
+    sklejania, więc w pamięci jest naraz jeden kawałek. Odczyty idą w puli
+    wątków MinIO. Połączenie jest zwalniane po wyczerpaniu/zamknięciu iteratora.
+    """
+    response = await run_in_minio_pool(
+        minio_client.get_object,
+        MINIO_BUCKET,
+        object_name,
+        offset=offset,
+        length=length,
+    )
+    return _iter_response(response)
+
+
+async def _iter_response(response) -> AsyncIterator[bytes]:
+    chunks = response.stream(MEDIA_STREAM_CHUNK_SIZE)
+    try:
+        while True:
+            chunk = await run_in_minio_pool(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        response.close()
+        response.release_conn()
+
+
+async def minio_put_bytes(object_name: str, data: bytes, content_type: str) -> str:
+    await run_in_minio_pool(
+        minio_client.put_object,
+        MINIO_BUCKET,
+        object_name,
+        io.BytesIO(data),
+        len(data),
+        content_type=content_type,
+    )
+    return minio_object_url(object_name)
+
+
+async def minio_remove_object(object_name: str) -> None:
+    await run_in_minio_pool(minio_client.remove_object, MINIO_BUCKET, object_name)
+
+
+async def minio_copy_object(source_name: str, object_name: str) -> None:
+    """Kopia po stronie serwera MinIO (bez przesyłania treści przez API)."""
+    await run_in_minio_pool(
+        minio_client.copy_object,
+        MINIO_BUCKET,
+        object_name,
+        CopySource(MINIO_BUCKET, source_name),
+    )
+
+
+async def minio_list_objects(prefix: str) -> List[Object]:
+    return await run_in_minio_pool(
+        lambda: list(
+            minio_client.list_objects(MINIO_BUCKET, prefix=prefix, recursive=True)
+        )
+    )
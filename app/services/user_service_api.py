@@ -1,56 +1,240 @@
+import asyncio
+import logging
+import random
+from typing import Optional
+
 import httpx
 from fastapi import HTTPException, status, Request
+from app.core.cache import RedisCache, TTLCache, create_shared_cache
 from app.core.config import (
+    CHILDREN_CACHE_LOCAL_TTL,
+    CHILDREN_CACHE_MAX_SIZE,
+    CHILDREN_CACHE_SERVE_STALE,
+    CHILDREN_CACHE_TTL,
+    REDIS_URL,
+    USER_SERVICE_BREAKER_FAILURES,
+    USER_SERVICE_BREAKER_RESET_TIMEOUT,
+    USER_SERVICE_CONNECT_TIMEOUT,
     USER_SERVICE_HOST,
+    USER_SERVICE_MAX_CONNECTIONS,
+    USER_SERVICE_MAX_KEEPALIVE,
+    USER_SERVICE_READ_TIMEOUT,
+    USER_SERVICE_RETRIES,
+    USER_SERVICE_RETRY_BACKOFF,
+)
+from app.core.resilience import CircuitBreaker, SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Statusy, przy których ponowienie GET-a ma sens (chwilowa niedostępność)
+RETRY_STATUS_CODES = {502, 503, 504}
+
+# Jeden klient (pula połączeń keep-alive) na proces, zarządzany w lifespan
+_client: Optional[httpx.AsyncClient] = None
+
+# parent_id -> lista ID dzieci; lokalnie w procesie + opcjonalnie w Redisie
+children_cache = TTLCache(CHILDREN_CACHE_MAX_SIZE, CHILDREN_CACHE_TTL)
+_shared_children_cache: Optional[RedisCache] = None
+
+# Równoległe requesty tego samego rodzica czekają na jedno wywołanie UserService
+_children_single_flight = SingleFlight()
+user_service_breaker = CircuitBreaker(
+    "user_service",
+    failure_threshold=USER_SERVICE_BREAKER_FAILURES,
+    reset_timeout=USER_SERVICE_BREAKER_RESET_TIMEOUT,
 )
 
 
+def init_client() -> httpx.AsyncClient:
+    global _client, _shared_children_cache
+
+    if _shared_children_cache is None:
+        _shared_children_cache = create_shared_cache(REDIS_URL, "children")
+    if _client is None:
+        _client = httpx.AsyncClient(
+            base_url=USER_SERVICE_HOST,
+            timeout=httpx.Timeout(
+                USER_SERVICE_READ_TIMEOUT, connect=USER_SERVICE_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=USER_SERVICE_MAX_CONNECTIONS,
+                max_keepalive_connections=USER_SERVICE_MAX_KEEPALIVE,
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client, _shared_children_cache
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _shared_children_cache is not None:
+        await _shared_children_cache.close()
+        _shared_children_cache = None
+
+
+def get_client() -> httpx.AsyncClient:
+    if _client is None:
+        raise RuntimeError("User Service client is not initialized, call init_client()")
+    return _client
+
+
+async def _get_with_retries(url: str, headers: dict) -> httpx.Response:
+    """
+    GET z ograniczoną liczbą ponowień przy błędach połączenia/timeoutach
+    i odpowiedziach 502/503/504. Backoff wykładniczy z pełnym jitterem,
+    żeby ponowienia wielu workerów nie uderzały w UserService naraz.
+    """
+    client = get_client()
+    for attempt in range(USER_SERVICE_RETRIES + 1):
+        last_attempt = attempt == USER_SERVICE_RETRIES
+        try:
+            response = await client.get(url, headers=headers)
+            if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                return response
+            logger.warning(
+                "User Service returned %s, retrying (%d/%d)",
+                response.status_code,
+                attempt + 1,
+                USER_SERVICE_RETRIES,
+            )
+        except httpx.TransportError as e:
+            if last_attempt:
+                raise
+            logger.warning(
+                "User Service request failed: %r, retrying (%d/%d)",
+                e,
+                attempt + 1,
+                USER_SERVICE_RETRIES,
+            )
+        await asyncio.sleep(random.uniform(0, USER_SERVICE_RETRY_BACKOFF * 2**attempt))
+
+
+async def _get_cached_children(parent_id: str) -> Optional[list[str]]:
+    child_ids = children_cache.get(parent_id)
+    if child_ids is None and _shared_children_cache is not None:
+        child_ids = await _shared_children_cache.get(parent_id)
+        if child_ids is not None:
+            children_cache.set(parent_id, child_ids, ttl=CHILDREN_CACHE_LOCAL_TTL)
+    return child_ids
+
+
+async def _cache_children(parent_id: str, child_ids: list[str]) -> None:
+    if _shared_children_cache is not None:
+        await _shared_children_cache.set(parent_id, child_ids, ttl=CHILDREN_CACHE_TTL)
+        children_cache.set(parent_id, child_ids, ttl=CHILDREN_CACHE_LOCAL_TTL)
+    else:
+        children_cache.set(parent_id, child_ids)
+
+
+async def invalidate_children(parent_id: str) -> None:
+    """Usuwa z cache listę dzieci rodzica (np. gdy UserService zgłosi zmianę)."""
+    children_cache.delete(parent_id)
+    if _shared_children_cache is not None:
+        await _shared_children_cache.delete(parent_id)
+
+
 async def get_children_for_parent(parent_id: str, request: Request) -> list[str]:
     """
-    Calls the UserService to get a list of child IDs for the given parent.
-    Propagates the Authorization header.
+    Returns the list of child IDs for the given parent, from cache when
+    possible, otherwise from UserService (propagating the Authorization header).
     """
+    child_ids = await _get_cached_children(parent_id)
+    if child_ids is not None:
+        return child_ids
+
     auth_header = request.headers.get("Authorization")
     if not auth_header:
+        # Błąd lokalny - nie dotyczy bezpiecznika.
         # To nie powinno się zdarzyć, jeśli endpoint jest chroniony CurrentUserDep
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authorization header missing",
         )
 
+    # Klucz z nagłówkiem: wołający dzielą pobranie tylko z kimś, kto ma
+    # te same uprawnienia, a nie z pierwszym, który trafił na brak w cache
+    return await _children_single_flight.run(
+        (parent_id, auth_header), lambda: _load_children(parent_id, auth_header)
+    )
+
+
+def _stale_children(parent_id: str) -> Optional[list[str]]:
+    if not CHILDREN_CACHE_SERVE_STALE:
+        return None
+    child_ids = children_cache.get_stale(parent_id)
+    if child_ids is not None:
+        logger.warning("User Service unavailable, serving stale children list")
+    return child_ids
+
+
+async def _load_children(parent_id: str, auth_header: str) -> list[str]:
+    """Pobranie z UserService za bezpiecznikiem, z awaryjnym starym wpisem z cache."""
+    if not user_service_breaker.allow_request():
+        child_ids = _stale_children(parent_id)
+        if child_ids is not None:
+            return child_ids
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="User Service is temporarily unavailable",
+        )
+
+    try:
+        child_ids = await _fetch_children(auth_header)
+    except HTTPException as e:
+        if e.status_code < 500 and isinstance(e.__cause__, httpx.HTTPStatusError):
+            # UserService odpowiedział (np. 401/404) - to nie awaria
+            user_service_breaker.record_success()
+            raise
+        user_service_breaker.record_failure()
+        child_ids = _stale_children(parent_id)
+        if child_ids is not None:
+            return child_ids
+        raise
+    except asyncio.CancelledError:
+        # Nie zostawiaj bezpiecznika w half-open z "wiszącą" próbą, ale
+        # anulowanie to nie błąd UserService
+        user_service_breaker.release()
+        raise
+
+    user_service_breaker.record_success()
+    await _cache_children(parent_id, child_ids)
+    return child_ids
+
+
+async def _fetch_children(auth_header: str) -> list[str]:
+    """
+    Calls the UserService to get a list of child IDs for the current user.
+    Propagates the Authorization header.
+    """
     headers = {"Authorization": auth_header}
-    url = f"{USER_SERVICE_HOST}/api/v1/users/current/children"  # Dostosuj URL do twojego UserService
+    url = "/api/v1/users/current/children"  # Dostosuj URL do twojego UserService
 
-    async with httpx.AsyncClient() as client:
+    try:
+        response = await _get_with_retries(url, headers)
+        response.raise_for_status()  # Rzuci wyjątek dla 4xx/5xx
+        children_data = response.json()  # Oczekuje listy obiektów child z polem 'id'
+        child_ids = [child.get("id") for child in children_data if child.get("id")]
+        return child_ids
+    except httpx.HTTPStatusError as e:
+        # Przekaż błąd z UserService lub zwróć własny
+        detail = f"Error fetching children from User Service: {e.response.status_code}"
         try:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()  # Rzuci wyjątek dla 4xx/5xx
-            children_data = (
-                response.json()
-            )  # Oczekuje listy obiektów child z polem 'id'
-            child_ids = [child.get("id") for child in children_data if child.get("id")]
-            return child_ids
-        except httpx.HTTPStatusError as e:
-            # Przekaż błąd z UserService lub zwróć własny
-            detail = (
-                f"Error fetching children from User Service: {e.response.status_code}"
-            )
-            try:
-                detail += f" - {e.response.json().get('detail', '')}"
-            except Exception:
-                pass
-            raise HTTPException(
-                status_code=e.response.status_code, detail=detail
-            ) from e
-
-        except httpx.RequestError as e:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Could not connect to User Service: {e}",
-            ) from e
-
-        except Exception as e:  # Ogólny błąd
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"An error occurred while communicating with User Service: {str(e)}",
-            ) from e
+            detail += f" - {e.response.json().get('detail', '')}"
+        except Exception:
+            pass
+        raise HTTPException(status_code=e.response.status_code, detail=detail) from e
+
+    except httpx.RequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Could not connect to User Service: {e}",
+        ) from e
+
+    except Exception as e:  # Ogólny błąd
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while communicating with User Service: {str(e)}",
+        ) from e